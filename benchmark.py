@@ -0,0 +1,312 @@
+"""Benchmarks of the valuation and UI hot paths on synthetic portfolios.
+
+Prices, dividends, FX and inflation come from SyntheticProvider, which is
+deterministic and never touches the network; market data goes through an
+in-memory MarketCache. Every stage is timed (best of ``--repeat`` runs)
+and then run once more under tracemalloc for its peak memory. Results are
+printed and can be written as JSON and compared with an earlier run:
+
+    python benchmark.py --scales small medium --output bench.json
+    python benchmark.py --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from market_cache import MarketCache, set_market_cache
+from paths import get_app_dir
+from providers import PRICE_COLUMNS, MarketDataProvider, _slice_history, set_provider
+from report import PortfolioReport
+from transaction_store import STORE_FILE, TransactionBook, TransactionStore
+from utils import eur_usd_cache, get_inflation_rate_annual
+from valuation import compute_daily_series, compute_yearly_dividends, transactions_frame
+
+SCALES = {
+    'small': {'tickers': 10, 'transactions': 1_000, 'years': 5},
+    'medium': {'tickers': 100, 'transactions': 10_000, 'years': 15},
+    'large': {'tickers': 500, 'transactions': 100_000, 'years': 30},
+}
+
+
+def _seed(*parts):
+    return zlib.crc32('|'.join(str(p) for p in parts).encode())
+
+
+class SyntheticProvider(MarketDataProvider):
+    """Deterministic random-walk prices, quarterly dividends and flat-ish inflation"""
+    name = 'synthetic'
+
+    def __init__(self, start, end):
+        self.days = pd.bdate_range(start, end)
+        self._history = {}
+
+    def history(self, ticker, start=None, end=None, period=None):
+        ticker = ticker.upper()
+        if ticker not in self._history:
+            rng = np.random.default_rng(_seed('history', ticker))
+            if ticker == 'EURUSD=X':
+                close = 1.1 * np.exp(np.cumsum(rng.normal(0, 0.003, len(self.days))))
+            else:
+                close = rng.uniform(10, 300) * np.exp(np.cumsum(rng.normal(0.0003, 0.015, len(self.days))))
+            self._history[ticker] = pd.DataFrame(
+                {'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close, 'Volume': 1e6},
+                index=self.days, columns=PRICE_COLUMNS,
+            )
+        return _slice_history(self._history[ticker], start, end, period)
+
+    def dividends(self, ticker):
+        rng = np.random.default_rng(_seed('dividends', ticker.upper()))
+        if rng.random() < 0.6:
+            return pd.Series(dtype=float, name='Dividends')
+        paid = pd.date_range(self.days[0], self.days[-1], freq='QS') + pd.Timedelta(days=14)
+        return pd.Series(rng.uniform(0.1, 1.0), index=paid, name='Dividends', dtype=float)
+
+    def inflation(self, series_code, start, end):
+        months = pd.period_range(pd.Period(start, 'M'), pd.Period(end, 'M'), freq='M')
+        rng = np.random.default_rng(_seed('inflation', series_code))
+        values = np.clip(2.0 + np.cumsum(rng.normal(0, 0.2, len(months))), -1.0, 10.0)
+        return pd.DataFrame({'TIME_PERIOD': months.strftime('%Y-%m'), 'OBS_VALUE': values.round(1)})
+
+    def search(self, query):
+        return []
+
+
+def synthetic_transactions(n_tickers, n_transactions, start, end, seed=0):
+    rng = np.random.default_rng(seed)
+    tickers = [f"S{i:04d}" for i in range(n_tickers)]
+    span = int((end - start).total_seconds())
+    when = start + pd.to_timedelta(np.sort(rng.integers(0, span, n_transactions)), unit='s')
+    return [
+        {'id': i + 1, 'ticker': tickers[t], 'shares': float(s), 'datetime': w.isoformat() + '+00:00',
+         'price_eur': float(p)}
+        for i, (t, s, w, p) in enumerate(zip(
+            rng.integers(0, n_tickers, n_transactions), rng.integers(1, 50, n_transactions),
+            when, rng.uniform(5, 500, n_transactions).round(2),
+        ))
+    ]
+
+
+def measure(fn, repeat, setup=None):
+    """Best and mean wall time over ``repeat`` runs, then peak traced memory of one more.
+
+    ``setup`` runs untimed before every call, e.g. to undo what ``fn`` cached.
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'best_s': min(times), 'mean_s': sum(times) / len(times), 'peak_mb': peak / 2**20}
+
+
+def run_scale(name, config, repeat, with_ui):
+    end = pd.Timestamp.now(tz='UTC').tz_localize(None).normalize()
+    start = end - pd.DateOffset(years=config['years'])
+    transactions = synthetic_transactions(config['tickers'], config['transactions'], start, end)
+    provider = SyntheticProvider(start - pd.Timedelta(days=10), end)
+    set_provider(provider)
+    results = {}
+
+    def fresh_cache():
+        set_market_cache(MarketCache(':memory:'))
+        eur_usd_cache.invalidate()
+
+    # Cold run: every price, dividend and inflation row goes through the cache
+    def cold_report():
+        fresh_cache()
+        PortfolioReport(transactions).calculate()
+    results['report_cold'] = measure(cold_report, 1)
+
+    fresh_cache()
+    report = PortfolioReport(transactions).calculate()
+    results['report_warm'] = measure(lambda: PortfolioReport(transactions).calculate(), repeat)
+    results['inflation'] = measure(lambda: get_inflation_rate_annual(report.first_ts, report.end_ts), repeat)
+
+    tx_df = transactions_frame(transactions)
+    results['daily_values'] = measure(
+        lambda: compute_daily_series(tx_df, report.date_range, report.ticker_prices, report.inflation_daily_series),
+        repeat,
+    )
+    dividends_by_ticker = {
+        ticker: report.get_dividend_data(ticker, report.first_ts, report.end_ts)
+        for ticker in tx_df['ticker'].unique()
+    }
+    results['yearly_dividends'] = measure(
+        lambda: compute_yearly_dividends(tx_df, dividends_by_ticker, report.annual_infl.index), repeat
+    )
+
+    # One new purchase on top of an existing valuation
+    added = dict(transactions[-1], id=len(transactions) + 1)
+    sources = (report.date_range, report.ticker_prices, report.inflation_daily_series)
+    results['patch_one'] = measure(
+        lambda: report.valuation.sync(transactions + [added], *sources) and report.valuation.sync(transactions, *sources),
+        repeat,
+    )
+
+    store = TransactionStore(':memory:')
+    store._conn.executemany(
+        "INSERT INTO transactions (id, ticker, shares, datetime, price_eur) VALUES (?, ?, ?, ?, ?)",
+        [(t['id'], t['ticker'], t['shares'], t['datetime'], t['price_eur']) for t in transactions],
+    )
+    results['transaction_book'] = measure(lambda: TransactionBook(store), repeat)
+
+    if with_ui:
+        results['update_ui'] = measure_update_ui(transactions, repeat)
+        results['first_paint'] = measure_first_paint(transactions, repeat)
+    return results
+
+
+def measure_first_paint(transactions, repeat):
+    """Time to the first paint of the main window, in fresh processes on a copy of the portfolio"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        _write_store(data_dir, transactions)
+
+        env = dict(os.environ, FINANCEAPP_DATA_DIR=data_dir)
+        env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        command = [sys.executable, os.path.join(get_app_dir(), 'financeApp.py'), '--measure-startup']
+        times = []
+        for _ in range(repeat):
+            output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+            fields = dict(f.split('=', 1) for line in output.splitlines()
+                          if line.startswith('first_paint_ms=') for f in line.split())
+            times.append(float(fields['first_paint_ms']) / 1000)
+    return {'best_s': min(times), 'mean_s': sum(times) / len(times), 'peak_mb': None,
+            'deferred_loaded': fields['deferred_loaded']}
+
+
+def _write_store(data_dir, transactions):
+    store = TransactionStore(os.path.join(data_dir, STORE_FILE))
+    with store._conn:
+        store._conn.executemany(
+            "INSERT INTO transactions (id, ticker, shares, datetime, price_eur) VALUES (?, ?, ?, ?, ?)",
+            [(t['id'], t['ticker'], t['shares'], t['datetime'], t['price_eur']) for t in transactions],
+        )
+    store._conn.close()
+
+
+def measure_update_ui(transactions, repeat):
+    """PortfolioManager.update_ui on the synthetic provider, quote refresh included.
+
+    The list model is emptied before every run, so each one fills and sorts
+    all rows like the first refresh after startup instead of finding them
+    unchanged.
+    """
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtCore import QThreadPool
+    from PyQt6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication([])
+    with tempfile.TemporaryDirectory() as data_dir:
+        _write_store(data_dir, transactions)
+        previous_dir = os.environ.get('FINANCEAPP_DATA_DIR')
+        os.environ['FINANCEAPP_DATA_DIR'] = data_dir
+        try:
+            from features import PortfolioManager
+            manager = PortfolioManager()
+            manager._market_ready = True
+            pool = QThreadPool.globalInstance()
+
+            def reset():
+                manager.portfolio_model.set_holdings([], {})
+
+            def update_ui():
+                manager.update_ui()
+                pool.waitForDone()
+                app.processEvents()
+
+            result = measure(update_ui, repeat, setup=reset)
+            manager.store._conn.close()
+            manager.deleteLater()
+        finally:
+            if previous_dir is None:
+                os.environ.pop('FINANCEAPP_DATA_DIR', None)
+            else:
+                os.environ['FINANCEAPP_DATA_DIR'] = previous_dir
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=get_app_dir(),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old, new):
+    old_index = {(r['scale'], r['stage']): r for r in old['results']}
+    print(f"{'scale':<8} {'stage':<18} {'before':>10} {'after':>10} {'change':>8}")
+    for r in new['results']:
+        before = old_index.get((r['scale'], r['stage']))
+        if before is None:
+            continue
+        change = (r['best_s'] / before['best_s'] - 1) * 100 if before['best_s'] else float('nan')
+        print(f"{r['scale']:<8} {r['stage']:<18} {before['best_s'] * 1000:>7.2f} ms {r['best_s'] * 1000:>7.2f} ms {change:>+7.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=['small', 'medium'])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-ui', action='store_true', help="skip the Qt model and first paint stages")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--compare', help="JSON results of an earlier run to compare with")
+    args = parser.parse_args(argv)
+
+    with_ui = not args.no_ui
+    if with_ui:
+        try:
+            import PyQt6.QtWidgets  # noqa: F401
+        except ImportError:
+            print("PyQt6 not available, skipping the update_ui and first_paint stages")
+            with_ui = False
+
+    run = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'results': [],
+    }
+    for scale in args.scales:
+        config = SCALES[scale]
+        print(f"== {scale}: {config['tickers']} tickers, {config['transactions']} transactions, {config['years']} years")
+        for stage, result in run_scale(scale, config, args.repeat, with_ui).items():
+            run['results'].append({'scale': scale, 'stage': stage, **config, **result})
+            peak = f"{result['peak_mb']:7.1f} MB" if result['peak_mb'] is not None else '      - MB'
+            print(f"  {stage:<18} best {result['best_s'] * 1000:9.2f} ms  "
+                  f"mean {result['mean_s'] * 1000:9.2f} ms  peak {peak}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(run, f, indent=2)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(json.load(f), run)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
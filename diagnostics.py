@@ -0,0 +1,175 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Events kept for the trace file; older ones are dropped, aggregates are not
+MAX_TRACE_EVENTS = 50_000
+TRACE_ENV = 'FINANCEAPP_TRACE'
+
+
+class SpanStats:
+    """Count and latency aggregate of one span name"""
+    __slots__ = ('name', 'category', 'count', 'errors', 'total', 'max')
+
+    def __init__(self, name, category):
+        self.name = name
+        self.category = category
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'category': self.category,
+            'count': self.count,
+            'errors': self.errors,
+            'total_ms': self.total * 1000,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'max_ms': self.max * 1000,
+        }
+
+
+class Tracer:
+    """Thread-safe recorder of timed spans and cache hits/misses.
+
+    Spans are cheap enough to leave on: one perf_counter pair and a dict
+    update. Every span is also kept as a Chrome trace event ("X" phase),
+    so ``export`` writes a file that chrome://tracing or Perfetto opens.
+    """
+    def __init__(self, max_events=MAX_TRACE_EVENTS):
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._events = deque(maxlen=max_events)
+        self._spans = {}
+        self._caches = {}
+        self._thread_names = {}
+
+    @contextmanager
+    def span(self, name, category='compute', **args):
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.add_span(name, category, start, time.perf_counter(), failed, args)
+
+    def add_span(self, name, category, start, end, failed=False, args=None):
+        """Record a span measured elsewhere; ``start``/``end`` are perf_counter values"""
+        duration = end - start
+        thread = threading.current_thread()
+        event = {
+            'name': name, 'cat': category, 'ph': 'X', 'pid': os.getpid(), 'tid': thread.ident,
+            'ts': (start - self._origin) * 1e6, 'dur': duration * 1e6,
+        }
+        if args or failed:
+            event['args'] = {k: str(v) for k, v in (args or {}).items()}
+            if failed:
+                event['args']['error'] = 'true'
+        with self._lock:
+            stats = self._spans.get(name)
+            if stats is None:
+                stats = self._spans[name] = SpanStats(name, category)
+            stats.count += 1
+            stats.errors += failed
+            stats.total += duration
+            stats.max = max(stats.max, duration)
+            self._events.append(event)
+            self._thread_names.setdefault(thread.ident, thread.name)
+
+    def cache(self, name, hit):
+        """Count one lookup of cache ``name``"""
+        with self._lock:
+            counts = self._caches.setdefault(name, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def span_stats(self):
+        """Aggregates per span name, slowest total first"""
+        with self._lock:
+            stats = [s.as_dict() for s in self._spans.values()]
+        return sorted(stats, key=lambda s: s['total_ms'], reverse=True)
+
+    def cache_stats(self):
+        with self._lock:
+            items = sorted(self._caches.items())
+        return [
+            {'name': name, 'hits': hits, 'misses': misses,
+             'hit_rate': hits / (hits + misses) if hits + misses else 0.0}
+            for name, (hits, misses) in items
+        ]
+
+    def reset(self):
+        with self._lock:
+            self._events.clear()
+            self._spans.clear()
+            self._caches.clear()
+
+    def export(self, path):
+        """Write a Chrome trace JSON file, atomically; returns the event count"""
+        with self._lock:
+            events = list(self._events)
+            thread_names = dict(self._thread_names)
+        pid = os.getpid()
+        metadata = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+            for tid, name in thread_names.items()
+        ]
+        payload = {
+            'traceEvents': metadata + events,
+            'displayTimeUnit': 'ms',
+            'otherData': {'spans': self.span_stats(), 'caches': self.cache_stats()},
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+        return len(events)
+
+
+_tracer = Tracer()
+
+
+def get_tracer():
+    """Process-wide tracer"""
+    return _tracer
+
+
+def span(name, category='compute', **args):
+    """``with span('report.prices', tickers=3): ...`` on the shared tracer"""
+    return _tracer.span(name, category, **args)
+
+
+def traced(name, category='compute'):
+    """Decorator timing every call of a function as one span"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _tracer.span(name, category):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def cache_lookup(name, hit):
+    _tracer.cache(name, hit)
+
+
+def _export_at_exit(path):
+    try:
+        _tracer.export(path)
+    except OSError as e:
+        print(f"Trace export error: {e}")
+
+
+# FINANCEAPP_TRACE=trace.json writes the trace when the process exits
+if os.environ.get(TRACE_ENV):
+    atexit.register(_export_at_exit, os.environ[TRACE_ENV])
@@ -1,20 +1,48 @@
-import yfinance as yf
-import requests
-import urllib.parse
 from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
+from datetime import datetime
 import pytz
-from datetime import timedelta
-from utils import ROME_TZ, get_eur_usd_rate, infer_price_eur_if_missing
+from diagnostics import get_tracer
+from market_cache import get_market_cache
+from stall_watchdog import get_watchdog
+from symbol_search import MAX_RESULTS, get_symbol_index, search_symbols
+from workers import FunctionWorker
+from utils import ROME_TZ, get_eur_usd_rate_on, infer_price_eur_if_missing
+
+
+PRICE_LOOKUP_DEBOUNCE_MS = 400
+SEARCH_DEBOUNCE_MS = 300
+
+
+def lookup_market_price(lookup_id, key):
+    """Worker job: EUR close near a date, returned with its lookup id and cache key"""
+    ticker, date = key
+    close = get_market_cache().close_near(ticker, date)
+    price_eur = close / max(get_eur_usd_rate_on(date), 1e-9) if close is not None else None
+    return lookup_id, key, price_eur
 
 
 class TransactionDialog(QDialog):
-    """Dialog for adding new transactions"""
-    def __init__(self, parent=None):
+    """Dialog for adding new transactions, or editing an existing one"""
+    def __init__(self, parent=None, transaction=None):
         super().__init__(parent)
         self.setWindowTitle("Aggiungi Transazione")
         self.resize(450, 400)
+        
+        # Price lookups are debounced, run on the thread pool and cached
+        self._price_cache = {}
+        self._lookup_id = 0
+        self._pending_worker = None
+        self._preserve_price = False
+        self._stored_shares = None
+        self.price_timer = QTimer(self)
+        self.price_timer.setSingleShot(True)
+        self.price_timer.setInterval(PRICE_LOOKUP_DEBOUNCE_MS)
+        self.price_timer.timeout.connect(self.start_price_lookup)
+        
         self.setup_ui()
+        if transaction is not None:
+            self.set_transaction_data(transaction)
         
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -22,8 +50,11 @@ class TransactionDialog(QDialog):
         
         # Form fields
         self.ticker_input = QLineEdit()
-        self.shares_input = QSpinBox()
-        self.shares_input.setRange(1, 1_000_000)
+        # Fractional shares (ETF savings plans, DRIP) need decimals
+        self.shares_input = QDoubleSpinBox()
+        self.shares_input.setRange(0.0001, 1_000_000)
+        self.shares_input.setDecimals(4)
+        self.shares_input.setSingleStep(1)
         self.shares_input.setValue(1)
         
         self.time_input = QDateTimeEdit()
@@ -84,42 +115,99 @@ class TransactionDialog(QDialog):
         
         self.update_market_price()
 
+    def set_transaction_data(self, transaction):
+        """Prefill the form from a stored transaction for editing"""
+        self.setWindowTitle("Modifica Transazione")
+        self.submit_button.setText("Salva")
+
+        utc_dt = datetime.fromisoformat(transaction['datetime'])
+        if utc_dt.tzinfo is None:
+            utc_dt = pytz.utc.localize(utc_dt)
+        local_dt = utc_dt.astimezone(ROME_TZ).replace(tzinfo=None)
+
+        for widget in (self.ticker_input, self.time_input):
+            widget.blockSignals(True)
+        self.ticker_input.setText(transaction['ticker'])
+        # The stored amount is kept as is unless the field is changed
+        self._stored_shares = float(transaction['shares'])
+        self.shares_input.setValue(self._stored_shares)
+        self.time_input.setDateTime(QDateTime(local_dt))
+        self.custom_price_input.setValue(float(transaction.get('price_eur', 0.0)))
+        for widget in (self.ticker_input, self.time_input):
+            widget.blockSignals(False)
+
+        # Keep the stored price until the user picks another ticker or date
+        self._preserve_price = True
+        self.ticker_input.textEdited.connect(self.release_price)
+        self.time_input.dateTimeChanged.connect(self.release_price)
+        self.update_market_price()
+
+    def release_price(self):
+        self._preserve_price = False
+
     def open_search_dialog(self):
         dialog = SearchStockDialog(self)
         if dialog.exec() == QDialog.DialogCode.Accepted and dialog.selected_ticker:
+            self.release_price()
             self.ticker_input.setText(dialog.selected_ticker)
             self.update_market_price()
 
     def update_market_price(self):
-        """Update market price display and optionally the custom price input"""
+        """Schedule a market price lookup once typing settles"""
+        self.cancel_price_lookup()
         ticker = self.ticker_input.text().upper().strip()
         if not ticker:
+            self.price_timer.stop()
             self.market_price_label.setText("Prezzo di Mercato (EUR): €0.00")
             return
-            
-        try:
-            date = self.time_input.dateTime().toPyDateTime().date()
-            hist = yf.Ticker(ticker).history(
-                start=date - timedelta(days=3), 
-                end=date + timedelta(days=4)
-            )
-            if hist.empty:
-                hist = yf.Ticker(ticker).history(period="5d")
-                
-            if not hist.empty:
-                eurusd = get_eur_usd_rate()
-                price_eur = float(hist.iloc[-1]['Close']) / max(eurusd, 1e-9)
-                self.market_price_label.setText(f"Prezzo di Mercato (EUR): €{price_eur:.4f}")
-                
-                # If custom price is 0 (default/special value), update it with market price
-                #if self.custom_price_input.value() <= 0.0001:
-                self.custom_price_input.setValue(price_eur)
-                    
-            else:
-                self.market_price_label.setText("Prezzo di mercato non trovato per questo simbolo.")
-        except Exception as e:
-            print(f"Update market price error: {e}")
-            self.market_price_label.setText("Errore nel recupero del prezzo di mercato.")
+        self.price_timer.start()
+
+    def cancel_price_lookup(self):
+        """Drop any queued lookup; a running one will be ignored when it returns"""
+        self._lookup_id += 1
+        if self._pending_worker is not None:
+            QThreadPool.globalInstance().tryTake(self._pending_worker)
+            self._pending_worker = None
+
+    def start_price_lookup(self):
+        ticker = self.ticker_input.text().upper().strip()
+        if not ticker:
+            return
+        key = (ticker, self.time_input.dateTime().toPyDateTime().date())
+        if key in self._price_cache:
+            self.show_market_price(self._price_cache[key])
+            return
+
+        self.market_price_label.setText("Ricerca prezzo di mercato...")
+        worker = FunctionWorker(lookup_market_price, self._lookup_id, key)
+        worker.signals.result.connect(self.on_price_result)
+        worker.signals.error.connect(self.on_price_error)
+        self._pending_worker = worker
+        QThreadPool.globalInstance().start(worker)
+
+    def on_price_result(self, result):
+        lookup_id, key, price_eur = result
+        self._price_cache[key] = price_eur
+        if lookup_id != self._lookup_id:
+            return
+        self._pending_worker = None
+        self.show_market_price(price_eur)
+
+    def on_price_error(self, error):
+        if self._pending_worker is None or self.sender() is not self._pending_worker.signals:
+            return
+        print(f"Update market price error: {error}")
+        self._pending_worker = None
+        self.market_price_label.setText("Errore nel recupero del prezzo di mercato.")
+
+    def show_market_price(self, price_eur):
+        """Update market price display and the custom price input"""
+        if price_eur is None:
+            self.market_price_label.setText("Prezzo di mercato non trovato per questo simbolo.")
+            return
+        self.market_price_label.setText(f"Prezzo di Mercato (EUR): €{price_eur:.4f}")
+        if not self._preserve_price:
+            self.custom_price_input.setValue(price_eur)
 
     def get_transaction_data(self):
         dt_local = self.time_input.dateTime().toPyDateTime()
@@ -140,9 +228,14 @@ class TransactionDialog(QDialog):
             except Exception:
                 final_price = infer_price_eur_if_missing(ticker, utc_dt) if ticker else 0.0
 
+        shares = self.shares_input.value()
+        stored = self._stored_shares
+        if stored is not None and shares == round(stored, self.shares_input.decimals()):
+            shares = stored
+
         return {
             "ticker": ticker,
-            "shares": float(self.shares_input.value()),
+            "shares": float(shares),
             "datetime": utc_dt.isoformat(),
             "price_eur": float(final_price)
         }
@@ -154,6 +247,14 @@ class SearchStockDialog(QDialog):
         self.setWindowTitle("Cerca Titolo")
         self.resize(480, 360)
         self.selected_ticker = None
+        
+        self._search_id = 0
+        self._search_worker = None
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.start_search)
+        
         self.setup_ui()
 
     def setup_ui(self):
@@ -171,33 +272,148 @@ class SearchStockDialog(QDialog):
         self.result_list.itemDoubleClicked.connect(self.select_stock)
 
     def search_stock(self, query):
+        """Show local prefix matches at once and debounce the network search"""
         query = query.strip()
-        self.result_list.clear()
+        self._search_id += 1
+        self.search_timer.stop()
         if len(query) < 2:
+            self.result_list.clear()
             return
-            
-        try:
-            url = f"https://query1.finance.yahoo.com/v1/finance/search?q={urllib.parse.quote(query)}"
-            response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            if 'quotes' in data and data['quotes']:
-                for item in data['quotes'][:15]:
-                    if 'symbol' in item:
-                        longname = item.get('longname', item.get('shortname', 'N/A'))
-                        text = f"{item['symbol']} - {longname}"
-                        list_item = QListWidgetItem(text)
-                        list_item.setData(Qt.ItemDataRole.UserRole, item['symbol'])
-                        self.result_list.addItem(list_item)
-            else:
-                self.result_list.addItem(QListWidgetItem("Nessun risultato trovato."))
-        except Exception as e:
-            print(f"Search error: {e}")
-            QMessageBox.warning(self, "Errore di ricerca", str(e))
+
+        self.show_results(get_symbol_index().complete(query))
+        self.search_timer.start()
+
+    def start_search(self):
+        query = self.search_input.text().strip()
+        if len(query) < 2:
+            return
+        worker = FunctionWorker(lambda search_id=self._search_id: (search_id, search_symbols(query)))
+        worker.signals.result.connect(self.on_search_result)
+        worker.signals.error.connect(self.on_search_error)
+        self._search_worker = worker
+        QThreadPool.globalInstance().start(worker)
+
+    def on_search_result(self, result):
+        search_id, quotes = result
+        if search_id != self._search_id:
+            return
+        local = get_symbol_index().complete(self.search_input.text())
+        remote_symbols = {item.get('symbol') for item in quotes}
+        merged = list(quotes) + [item for item in local if item['symbol'] not in remote_symbols]
+        self.show_results(merged, empty_text="Nessun risultato trovato.")
+
+    def on_search_error(self, error):
+        if self.sender() is not getattr(self._search_worker, 'signals', None):
+            return
+        print(f"Search error: {error}")
+        QMessageBox.warning(self, "Errore di ricerca", str(error))
+
+    def show_results(self, quotes, empty_text=None):
+        self.result_list.clear()
+        for item in quotes[:MAX_RESULTS]:
+            if 'symbol' in item:
+                longname = item.get('longname') or item.get('shortname') or 'N/A'
+                text = f"{item['symbol']} - {longname}"
+                list_item = QListWidgetItem(text)
+                list_item.setData(Qt.ItemDataRole.UserRole, item['symbol'])
+                self.result_list.addItem(list_item)
+        if self.result_list.count() == 0 and empty_text:
+            self.result_list.addItem(QListWidgetItem(empty_text))
 
     def select_stock(self, item):
         symbol = item.data(Qt.ItemDataRole.UserRole)
         if symbol:
             self.selected_ticker = symbol
             self.accept()
+
+
+class DiagnosticsDialog(QDialog):
+    """Hidden diagnostics view (Ctrl+Shift+D): span timings, cache hit rates and UI stalls"""
+    SPAN_COLUMNS = [('Span', 'name'), ('Categoria', 'category'), ('Chiamate', 'count'), ('Errori', 'errors'),
+                    ('Totale ms', 'total_ms'), ('Medio ms', 'mean_ms'), ('Max ms', 'max_ms')]
+    CACHE_COLUMNS = [('Cache', 'name'), ('Hit', 'hits'), ('Miss', 'misses'), ('Hit rate %', 'hit_rate')]
+    STALL_COLUMNS = [('Punto di blocco', 'where'), ('Blocchi', 'count'), ('Totale ms', 'total_ms'), ('Max ms', 'max_ms')]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Diagnostica")
+        self.resize(820, 560)
+        self.tracer = get_tracer()
+        self.setup_ui()
+        self.refresh()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        self.span_table = self._make_table(self.SPAN_COLUMNS)
+        self.cache_table = self._make_table(self.CACHE_COLUMNS)
+        layout.addWidget(QLabel("Tempi per operazione (rete e calcolo):"))
+        layout.addWidget(self.span_table, 3)
+        layout.addWidget(QLabel("Cache:"))
+        layout.addWidget(self.cache_table, 1)
+
+        # Only with FINANCEAPP_WATCHDOG_MS set
+        self.watchdog = get_watchdog()
+        if self.watchdog is not None:
+            self.stall_table = self._make_table(self.STALL_COLUMNS)
+            self.stall_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+            layout.addWidget(QLabel(f"Blocchi dell'interfaccia oltre {self.watchdog.threshold * 1000:.0f} ms:"))
+            layout.addWidget(self.stall_table, 2)
+
+        buttons = QHBoxLayout()
+        for text, slot in (("Aggiorna", self.refresh), ("Esporta trace...", self.export_trace),
+                           ("Azzera", self.reset), ("Chiudi", self.close)):
+            button = QPushButton(text)
+            button.clicked.connect(slot)
+            buttons.addWidget(button)
+        layout.addLayout(buttons)
+
+    @staticmethod
+    def _make_table(columns):
+        table = QTableWidget(0, len(columns))
+        table.setHorizontalHeaderLabels([title for title, _ in columns])
+        table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        return table
+
+    @staticmethod
+    def _fill(table, columns, rows):
+        table.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            for c, (_, key) in enumerate(columns):
+                value = row[key]
+                if key == 'hit_rate':
+                    value = value * 100
+                text = f"{value:.1f}" if isinstance(value, float) else str(value)
+                item = QTableWidgetItem(text)
+                if not isinstance(value, str):
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                table.setItem(r, c, item)
+
+    def refresh(self):
+        self._fill(self.span_table, self.SPAN_COLUMNS, self.tracer.span_stats())
+        self._fill(self.cache_table, self.CACHE_COLUMNS, self.tracer.cache_stats())
+        if self.watchdog is not None:
+            entries = self.watchdog.report.worst()
+            stalls = [
+                {'where': ' <- '.join(reversed(e['stack'][-3:])), 'count': e['count'],
+                 'total_ms': e['total_s'] * 1000, 'max_ms': e['max_s'] * 1000}
+                for e in entries
+            ]
+            self._fill(self.stall_table, self.STALL_COLUMNS, stalls)
+            for row, entry in enumerate(entries):
+                self.stall_table.item(row, 0).setToolTip('\n'.join(entry['stack']))
+
+    def reset(self):
+        self.tracer.reset()
+        self.refresh()
+
+    def export_trace(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Esporta Trace", "trace.json", "JSON (*.json)")
+        if not path:
+            return
+        try:
+            count = self.tracer.export(path)
+            QMessageBox.information(self, "Successo", f"{count} eventi esportati.")
+        except Exception as e:
+            QMessageBox.critical(self, "Errore", f"Errore nell'esportazione: {e}")
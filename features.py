@@ -1,15 +1,17 @@
-import json
-import sys
-import yfinance as yf
+import sqlite3
 import os
 from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
-from PyQt6.QtGui import QFont, QIcon
-import dateutil.parser
+from PyQt6.QtGui import QColor, QFont, QFontMetrics, QIcon, QKeySequence, QPainter, QShortcut
 from datetime import datetime
-from dialogs import TransactionDialog
-from models import PortfolioGraphWindow
-from utils import get_eur_usd_rate, ROME_TZ, INFLATION_RATE_ANNUAL
+from diagnostics import span, traced
+from models import PortfolioListModel, TransactionTableModel
+from paths import data_path, get_app_dir
+from portfolio_snapshot import PortfolioSnapshot, format_age, quote_time
+from transaction_store import STORE_FILE, TransactionBook, TransactionStore
+
+# pandas, numpy, pyqtgraph and the market data modules are imported where
+# they are first needed, so the main window paints before they load.
 
 
 
@@ -37,6 +39,51 @@ class SummaryCard(QFrame):
         self.label.setWordWrap(True)
         layout.addWidget(self.label)
 
+class TransactionActionDelegate(QStyledItemDelegate):
+    """Paints the edit/delete buttons of a transaction row and reports clicks"""
+    edit_requested = pyqtSignal(int)
+    delete_requested = pyqtSignal(int)
+    BUTTONS = (("Modifica", "#3B82F6", 'edit'), ("Elimina", "#EF4444", 'delete'))
+    BUTTON_WIDTH = 70
+    BUTTON_SPACING = 5
+
+    def button_rects(self, rect):
+        height = min(35, rect.height() - 8)
+        top = rect.top() + (rect.height() - height) // 2
+        right = rect.right() - self.BUTTON_SPACING
+        rects = []
+        for _ in self.BUTTONS:
+            rects.insert(0, QRect(right - self.BUTTON_WIDTH, top, self.BUTTON_WIDTH, height))
+            right -= self.BUTTON_WIDTH + self.BUTTON_SPACING
+        return rects
+
+    def sizeHint(self, option, index):
+        return QSize(len(self.BUTTONS) * (self.BUTTON_WIDTH + self.BUTTON_SPACING) + self.BUTTON_SPACING, 48)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setFont(QFont("Segoe UI", 10))
+        for rect, (label, color, _) in zip(self.button_rects(option.rect), self.BUTTONS):
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor(color))
+            painter.drawRoundedRect(QRectF(rect), 6, 6)
+            painter.setPen(QColor("#FFFFFF"))
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, label)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() != QEvent.Type.MouseButtonRelease:
+            return False
+        for rect, (_, _, action) in zip(self.button_rects(option.rect), self.BUTTONS):
+            if rect.contains(event.position().toPoint()):
+                tx_id = index.data(Qt.ItemDataRole.UserRole)
+                signal = self.edit_requested if action == 'edit' else self.delete_requested
+                # Let the view finish the click before the model is reset
+                QTimer.singleShot(0, lambda: signal.emit(tx_id))
+                return True
+        return False
+
 class SlidingWindow(QWidget):
     """Sliding window for detailed transaction view"""
     def __init__(self, parent=None):
@@ -63,17 +110,38 @@ class SlidingWindow(QWidget):
         self.summary_card = SummaryCard("")
         horizontal_layout.addWidget(self.summary_card, 1)
 
-        # Transactions scroll area
-        self.transactions_scroll = QScrollArea()
-        self.transactions_scroll.setWidgetResizable(True)
-        self.transactions_scroll.setStyleSheet("QScrollArea{border:none;}")
-        
-        self.list_widget = QListWidget()
-        self.list_widget.setObjectName("transactions_list_widget")
-        self.list_widget.setStyleSheet("QListWidget{border:none;background:#FFFFFF;}")
-        self.transactions_scroll.setWidget(self.list_widget)
+        # Transactions table, rows are fetched as they scroll into view
+        self.transactions_model = TransactionTableModel(self)
+        self.transactions_view = QTableView()
+        self.transactions_view.setModel(self.transactions_model)
+        self.transactions_view.setStyleSheet(
+            "QTableView{border:none;background:#FFFFFF;padding:0px;font-size:13px;}"
+            "QHeaderView::section{padding:4px;font-size:13px;}"
+        )
+        self.transactions_view.setShowGrid(False)
+        self.transactions_view.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.transactions_view.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.transactions_view.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.transactions_view.verticalHeader().setVisible(False)
+        self.transactions_view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.transactions_view.verticalHeader().setDefaultSectionSize(48)
+
+        self.action_delegate = TransactionActionDelegate(self.transactions_view)
+        self.action_delegate.edit_requested.connect(self.edit_transaction)
+        self.action_delegate.delete_requested.connect(self.delete_transaction)
+        self.transactions_view.setItemDelegateForColumn(TransactionTableModel.ACTION_COLUMN, self.action_delegate)
+
+        header = self.transactions_view.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        # Dates have a fixed width, so measuring the rows is never needed
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Fixed)
+        self.transactions_view.setColumnWidth(0, self.transactions_view.fontMetrics().horizontalAdvance("00/00/0000") + 12)
+        header.setSectionResizeMode(TransactionTableModel.ACTION_COLUMN, QHeaderView.ResizeMode.Fixed)
+        self.transactions_view.setColumnWidth(
+            TransactionTableModel.ACTION_COLUMN, self.action_delegate.sizeHint(None, None).width()
+        )
         
-        horizontal_layout.addWidget(self.transactions_scroll, 1)
+        horizontal_layout.addWidget(self.transactions_view, 1)
         layout.addLayout(horizontal_layout)
         layout.addSpacing(10)
 
@@ -82,55 +150,52 @@ class SlidingWindow(QWidget):
         self.graph_button.clicked.connect(self.show_graph)
         layout.addWidget(self.graph_button)
 
-    def update_info(self, ticker, transactions):
+    def update_info(self, ticker, transactions, holding):
         """Update the sliding window with ticker information"""
         self.ticker = ticker
         self.transactions = transactions
-        self.list_widget.clear()
+        self.transactions_model.set_transactions(transactions)
 
-        if not transactions:
+        if not transactions or holding is None:
             self.summary_card.label.setText(f"<h3>Nessuna transazione per {ticker}</h3>")
             return
 
-        # Calculate summary statistics
-        cost_basis, total_shares, cost_basis_real = self.calculate_portfolio_stats(transactions)
-        avg_price = (cost_basis / total_shares) if total_shares > 0 else 0.0
+        # Shares and cost basis come from the holdings index
+        cost_basis_real = self.calculate_portfolio_stats(transactions)
 
         # Get current market data and update summary
-        self.update_summary_card(ticker, total_shares, cost_basis, cost_basis_real)
-        
-        # Populate transaction list
-        self.populate_transaction_list(transactions)
+        self.update_summary_card(ticker, holding.shares, holding.cost_basis, cost_basis_real)
 
     def calculate_portfolio_stats(self, transactions):
-        """Calculate portfolio statistics using actual purchase prices"""
-        cost_basis = sum(float(t.get('price_eur', 0.0)) * float(t['shares']) for t in transactions)
-        total_shares = sum(float(t['shares']) for t in transactions)
-        
-        # Calculate inflation-adjusted cost basis using actual purchase prices
-        cost_basis_real = 0.0
+        """Inflation-adjusted cost basis using actual purchase prices"""
+        import numpy as np
+        import pandas as pd
+        from utils import build_inflation_index, INFLATION_RATE_ANNUAL
+
         end_date = datetime.utcnow().date()
-        inflation_rate_daily = (1 + INFLATION_RATE_ANNUAL)**(1/365) - 1
-        
-        for transaction in transactions:
-            try:
-                tx_date = dateutil.parser.parse(transaction['datetime']).date()
-                cost_nominal = float(transaction.get('price_eur', 0.0)) * float(transaction['shares'])
-                days_since = (end_date - tx_date).days
-                cost_basis_real += cost_nominal * (1 + inflation_rate_daily)**days_since
-            except Exception as e:
-                print(f"Inflation calculation error: {e}")
-                cost_basis_real += float(transaction.get('price_eur', 0.0)) * float(transaction['shares'])
-        
-        return cost_basis, total_shares, cost_basis_real
+        costs = [float(t.get('price_eur', 0.0)) * float(t['shares']) for t in transactions]
+
+        # Parse every date in one pass; unparseable ones count as today
+        tx_dates = pd.to_datetime([t['datetime'] for t in transactions], utc=True, format='ISO8601', errors='coerce')
+        tx_dates = tx_dates.tz_localize(None).normalize().fillna(pd.Timestamp(end_date))
+
+        inflation_daily, _ = build_inflation_index(
+            pd.Series(INFLATION_RATE_ANNUAL, index=[end_date.year]), min(tx_dates.min().date(), end_date), end_date
+        )
+        tx_inflation = inflation_daily.reindex(tx_dates).fillna(inflation_daily.iloc[-1])
+        return float((np.array(costs) * inflation_daily.iloc[-1] / tx_inflation.to_numpy()).sum())
 
+    @traced('ui.summary_card')
     def update_summary_card(self, ticker, total_shares, cost_basis, cost_basis_real):
         """Update the summary card with current market data"""
+        from market_cache import get_market_cache
+        from utils import get_eur_usd_rate
+
         try:
-            data = yf.Ticker(ticker).history(period='5d')
-            if not data.empty:
+            last_close = get_market_cache().last_close(ticker)
+            if last_close is not None:
                 eurusd = get_eur_usd_rate()
-                current_price_eur = float(data.iloc[-1]['Close']) / max(eurusd, 1e-9)
+                current_price_eur = last_close / max(eurusd, 1e-9)
                 current_value = current_price_eur * total_shares
                 
                 # Calculate gains/losses based on actual purchase prices
@@ -168,170 +233,138 @@ class SlidingWindow(QWidget):
             print(f"Market data error: {e}")
             self.summary_card.label.setText(f"<h2>{ticker}</h2><p>Impossibile recuperare i dati di mercato</p>")
 
-    def populate_transaction_list(self, transactions):
-        """Populate the transaction list with individual transactions"""
-        for i, transaction in enumerate(transactions):
-            try:
-                dt = dateutil.parser.parse(transaction['datetime']).astimezone(ROME_TZ)
-                date_str = dt.strftime("%d/%m/%Y")
-                qty = float(transaction['shares'])
-                price = float(transaction.get('price_eur', 0.0))
-                
-                # Create transaction item widget
-                item_widget = QWidget()
-                item_layout = QHBoxLayout(item_widget)
-                item_layout.setContentsMargins(6, 15, 6, 15)
-
-                label_text = f"<b>Data:</b> {date_str} | <b>Quantità:</b> {int(qty)} | <b>Prezzo:</b> €{price:.4f}"
-                label = QLabel(label_text)
-                item_layout.addWidget(label)
-                item_layout.addStretch()
-
-                # Delete button
-                delete_btn = QPushButton("Elimina")
-                delete_btn.setObjectName("delete_button")
-                delete_btn.clicked.connect(lambda _, idx=i: self.delete_transaction(idx))
-                item_layout.addWidget(delete_btn)
-
-                # Add to list
-                list_item = QListWidgetItem()
-                list_item.setSizeHint(item_widget.sizeHint())
-                self.list_widget.addItem(list_item)
-                self.list_widget.setItemWidget(list_item, item_widget)
+    def delete_transaction(self, tx_id):
+        """Delete a transaction by id and update the parent"""
+        if self.parent_window and self.parent_window.remove_transaction(tx_id):
+            self.parent_window.update_ui()
+            self.refresh()
 
-            except Exception as e:
-                print(f"Transaction card error {i}: {e}")
-
-    def delete_transaction(self, idx):
-        """Delete a transaction and update the parent"""
-        if 0 <= idx < len(self.transactions):
-            # Find the transaction in the parent's transaction list
-            tx_to_delete = self.transactions[idx]
-            if hasattr(self, 'parent_window') and self.parent_window:
-                # Remove from parent's transaction list
-                for i, tx in enumerate(self.parent_window.transactions):
-                    if (tx.get('ticker') == tx_to_delete.get('ticker') and
-                        tx.get('datetime') == tx_to_delete.get('datetime') and
-                        tx.get('shares') == tx_to_delete.get('shares')):
-                        del self.parent_window.transactions[i]
-                        break
-                
-                self.parent_window.save_transactions()
-                self.parent_window.update_ui()
-                
-                # Update this sliding window
-                updated_transactions = [t for t in self.parent_window.transactions 
-                                      if t.get('ticker', '').upper() == self.ticker.upper()]
-                self.update_info(self.ticker, updated_transactions)
+    def edit_transaction(self, tx_id):
+        """Edit a transaction by id and update the parent"""
+        if self.parent_window and self.parent_window.edit_transaction(tx_id):
+            self.refresh()
+
+    def refresh(self):
+        """Reload the current ticker from the parent's transaction book"""
+        book = self.parent_window.transactions
+        self.update_info(self.ticker, book.for_ticker(self.ticker), book.holdings.get(self.ticker))
 
     def show_graph(self):
         """Show graph for current ticker"""
         if hasattr(self, 'ticker') and self.transactions:
-            ticker_transactions = [t for t in self.transactions if t['ticker'].upper() == self.ticker.upper()]
-            PortfolioGraphWindow(ticker_transactions, self).exec()
+            from graph_window import PortfolioGraphWindow
+            with span('ui.graph_window', transactions=len(self.transactions)):
+                window = PortfolioGraphWindow(list(self.transactions), self)
+            window.exec()
         else:
             QMessageBox.warning(self, "Errore", "Nessun dato disponibile per il grafico.")
 
-class PortfolioItemCard(QFrame):
-    """Card widget for portfolio items in the main list"""
-    def __init__(self, ticker, total_shares, current_value_eur, gain_loss_eur, gain_loss_percent, avg_purchase_price):
-        super().__init__()
-        self.setFrameShape(QFrame.Shape.NoFrame)
-        self.setStyleSheet("background:#FFFFFF; border:none; border-radius:12px;")
-        self.setup_ui(ticker, total_shares, current_value_eur, gain_loss_eur, gain_loss_percent, avg_purchase_price)
+class PortfolioItemDelegate(QStyledItemDelegate):
+    """Paints portfolio rows as cards; no widget exists per row"""
+    ROW_HEIGHT = 130
+    CARD_MARGIN = 10
+    POSITIVE = QColor("#16A34A")
+    NEGATIVE = QColor("#DC2626")
 
-    def setup_ui(self, ticker, total_shares, current_value, gain_loss, gain_loss_pct, avg_purchase_price):
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(16, 18, 16, 18)
-        layout.setSpacing(15)
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.ticker_font = QFont("Segoe UI", 14, QFont.Weight.Bold)
+        self.text_font = QFont("Segoe UI", 11)
+        self.bold_font = QFont("Segoe UI", 11, QFont.Weight.Bold)
+        self.pl_font = QFont("Segoe UI", 12, QFont.Weight.Bold)
 
-        # Left side - basic info with improved layout
-        left_layout = QVBoxLayout()
-        left_layout.setSpacing(4)
-        
-        # Ticker label with larger font
-        ticker_label = QLabel(f"<b style='font-size:18px;'>{ticker}</b>")
-        ticker_label.setWordWrap(True)
-        ticker_label.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Preferred)
-        
-        # Quantity label with wrapping
-        quantity_label = QLabel(f"Quantità: <b>{total_shares:.4f}</b>")
-        quantity_label.setWordWrap(True)
-        quantity_label.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Preferred)
-        
-        # Average purchase price
-        avg_price_label = QLabel(f"Prezzo Medio: <b>€{avg_purchase_price:.4f}</b>")
-        avg_price_label.setWordWrap(True)
-        avg_price_label.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Preferred)
-        
-        # Value label with wrapping  
-        value_label = QLabel(f"Valore: <b>€{current_value:.2f}</b>")
-        value_label.setWordWrap(True)
-        value_label.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Preferred)
-        
-        left_layout.addWidget(ticker_label)
-        left_layout.addWidget(quantity_label)
-        left_layout.addWidget(avg_price_label)
-        left_layout.addWidget(value_label)
-        left_layout.addStretch()
-
-        # Right side - performance with fixed width
-        right_layout = QVBoxLayout()
-        performance_label = QLabel()
-        performance_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        performance_label.setWordWrap(True)
-        performance_label.setMinimumWidth(120)
-        performance_label.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Preferred)
-        
-        if gain_loss >= 0:
-            content = f"""
-            <div style='text-align:center;'>
-                <span style='color:#16A34A;font-size:16px;'><b>+€{gain_loss:.2f}</b></span><br>
-                <span style='color:#16A34A;'><b>(+{gain_loss_pct:.1f}%)</b></span>
-            </div>
-            """
-        else:
-            content = f"""
-            <div style='text-align:center;'>
-                <span style='color:#DC2626;font-size:16px;'><b>€{gain_loss:.2f}</b></span><br>
-                <span style='color:#DC2626;'><b>({gain_loss_pct:.1f}%)</b></span>
-            </div>
-            """
-        performance_label.setText(content)
-        right_layout.addWidget(performance_label)
-        right_layout.addStretch()
-
-        # Adjust layout proportions
-        layout.addLayout(left_layout, 7)
-        layout.addLayout(right_layout, 3)
-        
-        # Set minimum height for the card
-        self.setMinimumHeight(110)
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def paint(self, painter, option, index):
+        values = index.data(PortfolioListModel.ValuesRole)
+        if values is None:
+            return
+        total_shares, current_value, gain_loss, gain_loss_pct, avg_purchase_price = values
+        ticker = index.data(Qt.ItemDataRole.UserRole)
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        card = option.rect.adjusted(4, self.CARD_MARGIN // 2, -4, -self.CARD_MARGIN // 2)
+        selected = option.state & QStyle.StateFlag.State_Selected
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor("#E0E7FF") if selected else QColor("#FFFFFF"))
+        painter.drawRoundedRect(QRectF(card), 12, 12)
+
+        # Left side - ticker and position details
+        content = card.adjusted(16, 14, -16, -14)
+        right_width = max(120, content.width() * 3 // 10)
+        left = content.adjusted(0, 0, -right_width - 15, 0)
+        painter.setPen(QColor("#111827"))
+        painter.setFont(self.ticker_font)
+        line_height = QFontMetrics(self.ticker_font).height()
+        painter.drawText(QRect(left.left(), left.top(), left.width(), line_height),
+                         Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, ticker)
+
+        y = left.top() + line_height + 4
+        text_height = QFontMetrics(self.text_font).height()
+        for caption, value in (("Quantità: ", f"{total_shares:.4f}"),
+                               ("Prezzo Medio: ", f"€{avg_purchase_price:.4f}"),
+                               ("Valore: ", f"€{current_value:.2f}")):
+            painter.setFont(self.text_font)
+            painter.drawText(QRect(left.left(), y, left.width(), text_height),
+                             Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, caption)
+            caption_width = QFontMetrics(self.text_font).horizontalAdvance(caption)
+            painter.setFont(self.bold_font)
+            painter.drawText(QRect(left.left() + caption_width, y, left.width() - caption_width, text_height),
+                             Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, value)
+            y += text_height + 4
+
+        # Right side - performance
+        right = QRect(content.right() - right_width, content.top(), right_width, content.height())
+        sign = "+" if gain_loss >= 0 else ""
+        painter.setPen(self.POSITIVE if gain_loss >= 0 else self.NEGATIVE)
+        painter.setFont(self.pl_font)
+        pl_height = QFontMetrics(self.pl_font).height()
+        painter.drawText(QRect(right.left(), right.top(), right.width(), pl_height),
+                         Qt.AlignmentFlag.AlignCenter, f"{sign}€{gain_loss:.2f}")
+        painter.setFont(self.bold_font)
+        painter.drawText(QRect(right.left(), right.top() + pl_height + 2, right.width(), text_height),
+                         Qt.AlignmentFlag.AlignCenter, f"({sign}{gain_loss_pct:.1f}%)")
+        painter.restore()
 
 class PortfolioManager(QWidget):
     """Main application window"""
+    first_painted = pyqtSignal()
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Gestore Portafoglio d'Investimenti")
         self.resize(1080, 720)
         
         # Setup file path
-        if getattr(sys, 'frozen', False):
-            app_dir = os.path.dirname(sys.executable)
-        else:
-            app_dir = os.path.dirname(os.path.abspath(__file__))
-            
-        self.portfolio_file = os.path.join(app_dir, 'transactions.json')
+        self.portfolio_file = data_path('transactions.json')
+        self.store = TransactionStore(data_path(STORE_FILE), json_path=self.portfolio_file)
         
         # Load data and initialize
-        self.transactions = self.load_transactions()
-        self.last_selected_item = None
+        self.transactions = TransactionBook(self.store)
+        self.valuation = None
+        self.last_selected_ticker = None
+        
+        # Quotes are refreshed on the thread pool, stale batches are ignored
+        self._quote_generation = 0
+
+        # Market data is only loaded once the window has painted; until the
+        # refresh completes rows show the last saved snapshot
+        self._painted = False
+        self._market_ready = False
+        self._pending_batches = 0
+        self._quote_times = {}
+        self.snapshot = PortfolioSnapshot().load()
         
         self.setup_ui()
         self.update_ui()
+
+        # Hidden diagnostics view
+        QShortcut(QKeySequence("Ctrl+Shift+D"), self, activated=self.show_diagnostics)
         
         # Set icon if available
-        icon_path = os.path.join(app_dir, 'app_icon.ico')
+        icon_path = os.path.join(get_app_dir(), 'app_icon.ico')
         if os.path.exists(icon_path):
             self.setWindowIcon(QIcon(icon_path))
 
@@ -393,6 +426,15 @@ class PortfolioManager(QWidget):
         layout.addWidget(self.btn_add)
         layout.addStretch()
         
+        self.btn_import = QPushButton("Importa JSON")
+        self.btn_import.clicked.connect(self.import_transactions)
+        
+        self.btn_export = QPushButton("Esporta JSON")
+        self.btn_export.clicked.connect(self.export_transactions)
+        
+        layout.addWidget(self.btn_import)
+        layout.addWidget(self.btn_export)
+        
         return sidebar
 
     def create_actions_view(self):
@@ -402,17 +444,48 @@ class PortfolioManager(QWidget):
         layout.setContentsMargins(14, 14, 14, 14)
         layout.setSpacing(12)
         
-        # Transaction list
-        self.list = QListWidget()
-        self.list.setStyleSheet("QListWidget{background:#FFFFFF;border:none;}")
-        self.list.itemClicked.connect(self.toggle_sliding_window)
+        # Filter and sort controls
+        controls = QHBoxLayout()
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("Filtra per simbolo...")
+        self.sort_input = QComboBox()
+        for label, key, descending in (("Simbolo (A-Z)", 'ticker', False),
+                                       ("Valore (decrescente)", 'value', True),
+                                       ("Guadagno/Perdita € (decrescente)", 'pl', True),
+                                       ("Guadagno/Perdita % (decrescente)", 'pl_pct', True)):
+            self.sort_input.addItem(label, (key, descending))
+        controls.addWidget(self.filter_input, 1)
+        controls.addWidget(self.sort_input)
+
+        # Portfolio list: a model with a painting delegate, rows are never widgets
+        self.portfolio_model = PortfolioListModel(self)
+        self.list = QListView()
+        self.list.setModel(self.portfolio_model)
+        self.list.setItemDelegate(PortfolioItemDelegate(self.list))
+        self.list.setUniformItemSizes(True)
+        self.list.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.list.setStyleSheet("QListView{background:#FFFFFF;border:none;padding:8px;}")
+        self.list.clicked.connect(self.toggle_sliding_window)
         self.list.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.filter_input.textChanged.connect(self.portfolio_model.set_filter)
+        self.sort_input.currentIndexChanged.connect(self.apply_sort)
+
+        self.lab_snapshot_age = QLabel()
+        self.lab_snapshot_age.setStyleSheet("color:#6B7280;")
+        self.lab_snapshot_age.setVisible(False)
+
+        self.lab_no_transactions = QLabel("Nessuna transazione disponibile")
+        self.lab_no_transactions.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.lab_no_transactions.setVisible(False)
 
         # Sliding window
         self.slide = SlidingWindow(self)
         self.slide.setMaximumHeight(0)
         
+        layout.addLayout(controls)
+        layout.addWidget(self.lab_snapshot_age)
         layout.addWidget(self.list)
+        layout.addWidget(self.lab_no_transactions, 1)
         layout.addSpacing(6)
         layout.addWidget(self.slide)
 
@@ -456,35 +529,88 @@ class PortfolioManager(QWidget):
             self.lab_empty_state.show()
         else:
             self.lab_empty_state.hide()
-            PortfolioGraphWindow(self.transactions, self).exec()
+            from graph_window import PortfolioGraphWindow
+            # Keep the valuation so the next window only patches what changed
+            with span('ui.graph_window', transactions=len(self.transactions)):
+                window = PortfolioGraphWindow(list(self.transactions), self, valuation=self.valuation)
+            window.exec()
+            self.valuation = window.valuation
+
+    def remove_transaction(self, tx_id):
+        """Delete a single transaction by id"""
+        try:
+            self.transactions.remove(tx_id)
+            return True
+        except Exception as e:
+            QMessageBox.critical(self, "Errore", f"Errore nel salvataggio: {e}")
+            return False
+
+    def edit_transaction(self, tx_id):
+        """Edit a single transaction by id through the transaction dialog"""
+        transaction = self.transactions.get(tx_id)
+        if transaction is None:
+            return False
+        from dialogs import TransactionDialog
+        dialog = TransactionDialog(self, transaction=transaction)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return False
+        try:
+            data = dialog.get_transaction_data()
+            if not (data['ticker'] and data['shares'] > 0 and data['price_eur'] > 0):
+                QMessageBox.warning(self, "Errore", "Dati transazione non validi.")
+                return False
+            self.transactions.update(tx_id, data)
+        except Exception as e:
+            QMessageBox.critical(self, "Errore", f"Errore nella modifica della transazione: {e}")
+            return False
+        self.update_ui()
+        return True
 
-    def load_transactions(self):
-        """Load transactions from file"""
+    def export_transactions(self):
+        """Export all transactions to a JSON file"""
+        path, _ = QFileDialog.getSaveFileName(self, "Esporta Transazioni", self.portfolio_file, "JSON (*.json)")
+        if not path:
+            return
         try:
-            with open(self.portfolio_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data if isinstance(data, list) else []
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            print(f"Load error: {e}")
-            return []
+            count = self.store.export_json(path)
+            QMessageBox.information(self, "Successo", f"{count} transazioni esportate.")
+        except Exception as e:
+            QMessageBox.critical(self, "Errore", f"Errore nell'esportazione: {e}")
 
-    def save_transactions(self):
-        """Save transactions to file"""
+    def import_transactions(self):
+        """Import transactions from a JSON file, appending them to the store"""
+        path, _ = QFileDialog.getOpenFileName(self, "Importa Transazioni", os.path.dirname(self.portfolio_file), "JSON (*.json)")
+        if not path:
+            return
         try:
-            with open(self.portfolio_file, 'w', encoding='utf-8') as f:
-                json.dump(self.transactions, f, indent=4, ensure_ascii=False)
+            count = self.store.import_json(path)
         except Exception as e:
-            QMessageBox.critical(self, "Errore", f"Errore nel salvataggio: {e}")
+            QMessageBox.critical(self, "Errore", f"Errore nell'importazione: {e}")
+            return
+        try:
+            self.transactions.reload()
+        except sqlite3.Error as e:
+            print(f"Load error: {e}")
+        self.update_ui()
+        QMessageBox.information(self, "Successo", f"{count} transazioni importate.")
 
     def add_transaction(self):
         """Add a new transaction"""
+        from dialogs import TransactionDialog
+        from symbol_search import get_symbol_index
+
+        # Held tickers autocomplete in the search dialog without a request
+        symbol_index = get_symbol_index()
+        for ticker in self.transactions.tickers():
+            symbol_index.add(ticker)
+        symbol_index.save()
+
         dialog = TransactionDialog(self)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             try:
                 data = dialog.get_transaction_data()
                 if data['ticker'] and data['shares'] > 0 and data['price_eur'] > 0:
-                    self.transactions.append(data)
-                    self.save_transactions()
+                    self.transactions.add(data)
                     self.update_ui()
                     QMessageBox.information(self, "Successo", "Transazione aggiunta e salvata!")
                 else:
@@ -492,90 +618,114 @@ class PortfolioManager(QWidget):
             except Exception as e:
                 QMessageBox.critical(self, "Errore", f"Errore nell'aggiunta della transazione: {e}")
 
+    def show_diagnostics(self):
+        from dialogs import DiagnosticsDialog
+        DiagnosticsDialog(self).exec()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._painted:
+            self._painted = True
+            self.first_painted.emit()
+            QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        """Load the market data stack once the window is on screen, then fill in prices"""
+        with span('startup.market_data'):
+            self._market_ready = True
+            self.update_ui()
+
+    @traced('ui.update_ui')
     def update_ui(self):
         """Update the user interface with current data"""
-        self.list.clear()
-        
-        if not self.transactions:
-            self.list.addItem(QListWidgetItem("Nessuna transazione disponibile"))
+        has_transactions = len(self.transactions) > 0
+        self.lab_no_transactions.setVisible(not has_transactions)
+        self.list.setVisible(has_transactions)
+
+        self._quote_generation += 1
+        if not self._market_ready:
+            # Before the first paint rows show the snapshot, or their cost basis
+            self.portfolio_model.set_holdings(list(self.transactions.holdings), self.snapshot.prices())
+            self.show_snapshot_age()
             return
 
-        # Group transactions by ticker
-        summary = {}
-        for transaction in self.transactions:
-            ticker = transaction.get('ticker', '').upper()
-            if not ticker:
-                continue
-                
-            if ticker not in summary:
-                summary[ticker] = {'shares': 0.0, 'transactions': []}
-            
-            summary[ticker]['shares'] += float(transaction.get('shares', 0.0))
-            summary[ticker]['transactions'].append(transaction)
-
-        # Create portfolio items
-        eurusd = get_eur_usd_rate()
-        for ticker, data in summary.items():
-            self.create_portfolio_item(ticker, data, eurusd)
+        from market_cache import get_market_cache
+        from utils import get_cached_eur_usd_rate
+        from workers import start_quote_refresh
+
+        # Fill rows from cached prices, then refresh quotes in the background
+        self._quote_times = {}
+        market_cache = get_market_cache()
+        eurusd = max(get_cached_eur_usd_rate(), 1e-9)
+        holdings = list(self.transactions.holdings)
+        prices_eur = self.snapshot.prices()
+        for holding in holdings:
+            cached_close = market_cache.cached_close(holding.ticker)
+            if cached_close is not None:
+                prices_eur[holding.ticker] = cached_close / eurusd
+        self.portfolio_model.set_holdings(holdings, prices_eur)
+
+        if holdings:
+            self._pending_batches = start_quote_refresh(
+                self._quote_generation, [h.ticker for h in holdings], self.on_quote_ready,
+                on_finished=self.on_quote_batch_finished,
+            )
+        else:
+            self.save_snapshot()
 
-    def create_portfolio_item(self, ticker, data, eurusd):
-        """Create a portfolio item card using actual purchase prices"""
-        total_shares = float(data['shares'])
-        
-        # Calculate cost basis using actual purchase prices
-        cost_basis = sum(
-            float(tx.get('price_eur', 0.0)) * float(tx.get('shares', 0.0)) 
-            for tx in data['transactions']
-        )
-        
-        # Calculate average purchase price
-        avg_purchase_price = (cost_basis / total_shares) if total_shares > 0 else 0.0
-        
-        # Get current market value
-        current_value = cost_basis
-        profit_loss = 0.0
-        profit_loss_pct = 0.0
-        
-        try:
-            hist = yf.Ticker(ticker).history(period='5d')
-            if not hist.empty:
-                last_price_usd = float(hist.iloc[-1]['Close'])
-                last_price_eur = last_price_usd / max(eurusd, 1e-9)
-                current_value = last_price_eur * total_shares
-                profit_loss = current_value - cost_basis
-                profit_loss_pct = (profit_loss / cost_basis * 100.0) if cost_basis > 0 else 0.0
-        except Exception as e:
-            print(f"Price error for {ticker}: {e}")
+    def show_snapshot_age(self):
+        age = self.snapshot.age()
+        if age is None:
+            self.lab_snapshot_age.setVisible(False)
+            return
+        self.lab_snapshot_age.setText(f"Valori salvati {format_age(age)}, aggiornamento in corso...")
+        self.lab_snapshot_age.setVisible(True)
 
-        # Create and add card with average purchase price
-        card = PortfolioItemCard(ticker, total_shares, current_value, profit_loss, profit_loss_pct, avg_purchase_price)
-        list_item = QListWidgetItem()
+    def on_quote_batch_finished(self, generation):
+        if generation != self._quote_generation:
+            return
+        self._pending_batches -= 1
+        if self._pending_batches == 0:
+            self.save_snapshot()
+
+    def save_snapshot(self):
+        """Persist the prices on screen; the age note goes away once they are live"""
+        self.snapshot.save(self.portfolio_model.price_rows(), self._quote_times)
+        self.lab_snapshot_age.setVisible(False)
+
+    def closeEvent(self, event):
+        if self._market_ready:
+            self.save_snapshot()
+        super().closeEvent(event)
+
+    def on_quote_ready(self, generation, ticker, price_eur, close_date):
+        """Fill in a row as soon as its quote arrives"""
+        if generation != self._quote_generation or price_eur is None:
+            return
+        # An old stored close (e.g. offline) keeps the age of its trading day
+        self._quote_times[ticker] = quote_time(close_date)
+        self.portfolio_model.update_price(ticker, price_eur)
 
-        # Increase spacing between items
-        card_size = card.sizeHint()
-        list_item.setSizeHint(QSize(card_size.width(), card_size.height() + 20))
-        list_item.setData(Qt.ItemDataRole.UserRole, ticker)
-        
-        self.list.addItem(list_item)
-        self.list.setItemWidget(list_item, card)
+    def apply_sort(self):
+        key, descending = self.sort_input.currentData()
+        self.portfolio_model.set_sort(key, descending)
 
-    def toggle_sliding_window(self, item):
-        """Toggle the sliding window for a selected item"""
-        ticker = item.data(Qt.ItemDataRole.UserRole)
+    def toggle_sliding_window(self, index):
+        """Toggle the sliding window for a selected row"""
+        ticker = index.data(Qt.ItemDataRole.UserRole)
         if not ticker:
             return
             
-        transactions = [t for t in self.transactions if t.get('ticker', '').upper() == ticker]
-
-        if (self.last_selected_item == item and 
+        if (self.last_selected_ticker == ticker and 
             self.slide.isVisible() and 
             self.slide.maximumHeight() > 0):
             self.close_sliding_window()
             return
 
-        self.slide.update_info(ticker, transactions)
+        with span('ui.sliding_window', ticker=ticker):
+            self.slide.update_info(ticker, self.transactions.for_ticker(ticker), self.transactions.holdings.get(ticker))
         self.open_sliding_window()
-        self.last_selected_item = item
+        self.last_selected_ticker = ticker
 
     def open_sliding_window(self):
         """Open the sliding window with animation"""
@@ -596,7 +746,7 @@ class PortfolioManager(QWidget):
         self.anim.setStartValue(self.slide.maximumHeight())
         self.anim.setEndValue(0)
         self.anim.start()
-        self.last_selected_item = None
+        self.last_selected_ticker = None
 
     def close_sliding_window_immediate(self):
         """Close the sliding window immediately without animation"""
@@ -604,4 +754,4 @@ class PortfolioManager(QWidget):
         self._closing = False
         self.slide.setVisible(False)
         self.slide.setMaximumHeight(0)
-        self.last_selected_item = None
+        self.last_selected_ticker = None
@@ -1,28 +1,88 @@
+import time
+
+STARTED_AT = time.perf_counter()
+
+import argparse
 import sys
 import os
-from PyQt6.QtWidgets import *
-from PyQt6.QtCore import *
-from PyQt6.QtGui import  QPixmap
-import pyqtgraph as pg
-from features import PortfolioManager
-from utils import apply_stylesheet, SplashScreen
 
-# Configuration
-pg.setConfigOption('background', '#FFFFFF')
-pg.setConfigOption('foreground', '#1f2937')
+# Modules that must not load before the main window paints
+DEFERRED_MODULES = ('pandas', 'numpy', 'pyqtgraph', 'yfinance', 'requests', 'ecbdata', 'dateutil')
 
 
-def main():
+def parse_args(argv):
+    """Options of the headless mode; anything else is left to Qt"""
+    parser = argparse.ArgumentParser(description="Gestore Portafoglio d'Investimenti")
+    parser.add_argument('--report', metavar='DIR',
+                        help="compute the portfolio valuation without GUI and write it to DIR")
+    parser.add_argument('--format', choices=('csv', 'json', 'both'), default='csv',
+                        help="output format of --report (default: csv)")
+    parser.add_argument('--ticker', action='append', default=[],
+                        help="only value this ticker (repeatable)")
+    parser.add_argument('--measure-startup', action='store_true',
+                        help="print the time to the first paint of the main window and quit")
+    return parser.parse_known_args(argv)[0]
+
+
+def run_report(args):
+    """Headless valuation for scheduled runs; never imports PyQt6"""
+    from paths import data_path
+    from report import PortfolioReport
+    from transaction_store import STORE_FILE, TransactionStore
+
+    try:
+        store = TransactionStore(data_path(STORE_FILE), json_path=data_path('transactions.json'))
+        transactions = store.load()
+        if args.ticker:
+            tickers = {t.upper() for t in args.ticker}
+            transactions = [t for t in transactions if t['ticker'].upper() in tickers]
+        if not transactions:
+            print("No transactions to value.")
+            return 1
+
+        os.makedirs(args.report, exist_ok=True)
+        report = PortfolioReport(transactions).calculate()
+        if report.missing_prices:
+            # Keep the last good files rather than writing zero values
+            print(f"No price history for: {', '.join(report.missing_prices)}", file=sys.stderr)
+            return 1
+        for path in report.write(args.report, args.format):
+            print(path)
+        return 0
+    except Exception as e:
+        print(f"Report error: {e}")
+        return 1
+
+
+def report_first_paint(measure):
+    """Record the time from process start to the first paint of the main window"""
+    from diagnostics import get_tracer
+
+    now = time.perf_counter()
+    get_tracer().add_span('startup.first_paint', 'startup', STARTED_AT, now)
+    if measure:
+        loaded = [name for name in DEFERRED_MODULES if name in sys.modules]
+        print(f"first_paint_ms={(now - STARTED_AT) * 1000:.1f} deferred_loaded={','.join(loaded) or 'none'}")
+
+
+def run_gui(measure_startup=False):
     """Main application entry point"""
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtGui import QPixmap
+    from features import PortfolioManager
+    from theme import apply_stylesheet, SplashScreen
+    from stall_watchdog import start_watchdog_from_env
+
     try:
         app = QApplication(sys.argv)
-        
+        start_watchdog_from_env(app)
+
         # Get application directory
         if getattr(sys, 'frozen', False):
             app_dir = os.path.dirname(sys.executable)
         else:
             app_dir = os.path.dirname(os.path.abspath(__file__))
-        
+
         # Show splash screen if image exists
         splash_path = os.path.join(app_dir, 'splash.png')
         if os.path.exists(splash_path):
@@ -31,26 +91,33 @@ def main():
             splash.show_message("Applicazione stili...")
         else:
             splash = None
-        
+
         # Apply styles
         apply_stylesheet(app)
-        
+
         if splash:
             splash.show_message("Caricamento dati...")
-        
+
         # Create main window
         window = PortfolioManager()
-        
+        window.first_painted.connect(lambda: report_first_paint(measure_startup))
+        if measure_startup:
+            window.first_painted.connect(app.quit)
+
         if splash:
             splash.finish(window)
-        
+
         window.show()
-        sys.exit(app.exec())
-        
+        return app.exec()
+
     except Exception as e:
         print(f"Application startup error: {e}")
-        sys.exit(1)
+        return 1
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    sys.exit(run_report(args) if args.report else run_gui(args.measure_startup))
 
 if __name__ == '__main__':
     main()
-
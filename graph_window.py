@@ -0,0 +1,439 @@
+from PyQt6.QtWidgets import *
+from PyQt6.QtCore import *
+from PyQt6.QtGui import QFont
+import pyqtgraph as pg
+import numpy as np
+from diagnostics import span
+from report import PortfolioReport
+
+pg.setConfigOption('background', '#FFFFFF')
+pg.setConfigOption('foreground', '#1f2937')
+
+
+class ClickablePlotWidget(pg.PlotWidget):
+    """Interactive plot widget with hover functionality.
+
+    Curves are clipped to the visible range and peak-downsampled to the
+    screen resolution. Hovering binary-searches each curve's sorted x values
+    and measures distances in pixels.
+    """
+    HOVER_RADIUS_PX = 20
+
+    def __init__(self, parent=None, date_range=None):
+        super().__init__(parent)
+        # PlotWidget forwards clear() to its PlotItem through an instance
+        # attribute, which would bypass the override below
+        del self.clear
+        self.date_range = date_range
+        self.plot_items = {}
+        self._hovered = None
+        self.setup_ui()
+        
+    def setup_ui(self):
+        self.setMouseTracking(True)
+        self.scene().sigMouseMoved.connect(self.on_mouse_moved)
+
+        self.hover_label = pg.TextItem(text="", color=(0, 0, 0))
+        self.hover_point = pg.ScatterPlotItem(
+            size=10, symbol='o', brush=pg.mkBrush(color='r'), pen=pg.mkPen(color='w', width=1)
+        )
+        # Added to the view box directly, so clearing the curves keeps them
+        view_box = self.getPlotItem().vb
+        view_box.addItem(self.hover_label, ignoreBounds=True)
+        view_box.addItem(self.hover_point, ignoreBounds=True)
+        self.hide_hover_info()
+        
+        # Only draw what is on screen, at most a few points per pixel
+        plot_item = self.getPlotItem()
+        plot_item.setClipToView(True)
+        plot_item.setDownsampling(auto=True, mode='peak')
+
+        # Styling
+        for axis in ['bottom', 'left']:
+            self.getAxis(axis).setTickFont(QFont("Segoe UI", 8))
+            self.getAxis(axis).setPen(pg.mkPen(color='#1f2937'))
+        plot_item.showGrid(x=True, y=True, alpha=0.5)
+
+    def plot(self, *args, **kwargs):
+        """Plot a curve; x values must be sorted ascending for hover lookups"""
+        kwargs.setdefault('skipFiniteCheck', True)
+        item = self.getPlotItem().plot(*args, **kwargs)
+        x_data, y_data = item.xData, item.yData
+        if x_data is not None and len(x_data):
+            self.plot_items[item] = (kwargs.get('name', ''), np.asarray(x_data, dtype=float), np.asarray(y_data, dtype=float))
+        return item
+
+    def clear(self):
+        """Remove every curve and forget its hover data"""
+        self.getPlotItem().clear()
+        self.plot_items = {}
+        self.hide_hover_info()
+    
+    def on_mouse_moved(self, evt):
+        if not self.sceneBoundingRect().contains(evt):
+            return
+            
+        mouse_point = self.getPlotItem().vb.mapSceneToView(evt)
+        x_mouse, y_mouse = mouse_point.x(), mouse_point.y()
+        
+        closest_point = self.find_closest_point(x_mouse, y_mouse)
+        
+        if closest_point:
+            self.show_hover_info(closest_point)
+        else:
+            self.hide_hover_info()
+
+    def find_closest_point(self, x_mouse, y_mouse):
+        pixel_width, pixel_height = self.getPlotItem().vb.viewPixelSize()
+        if not pixel_width or not pixel_height:
+            return None
+
+        closest_point_data = None
+        min_distance = self.HOVER_RADIUS_PX
+        for item, (name, x_data, y_data) in self.plot_items.items():
+            if not item.isVisible():
+                continue
+
+            # Nearest x by binary search, then compare in pixels
+            pos = np.searchsorted(x_data, x_mouse)
+            if pos == len(x_data) or (pos > 0 and x_mouse - x_data[pos - 1] < x_data[pos] - x_mouse):
+                pos -= 1
+            dx = (x_data[pos] - x_mouse) / pixel_width
+            dy = (y_data[pos] - y_mouse) / pixel_height
+            distance = np.hypot(dx, dy)
+
+            if distance < min_distance:
+                min_distance = distance
+                closest_point_data = {
+                    'x': x_data[pos],
+                    'y': y_data[pos],
+                    'name': name,
+                    'index': int(pos)
+                }
+        
+        return closest_point_data
+
+    def show_hover_info(self, point_data):
+        key = (point_data['name'], point_data['index'])
+        if key == self._hovered and self.hover_label.isVisible():
+            return
+        self._hovered = key
+        if not (self.date_range is None) and point_data['index'] < len(self.date_range):
+            date_str = self.date_range[point_data['index']].strftime("%Y-%m-%d")
+            text = (f"<b>{point_data['name']}</b><br>"
+                   f"Data: {date_str}<br>"
+                   f"Valore: €{point_data['y']:.2f}")
+            
+            html = f"<div style='background: white; border: 1px solid black; padding: 5px; border-radius: 5px; font-size: 10px;'>{text}</div>"
+            self.hover_label.setHtml(html)
+            self.hover_label.setPos(point_data['x'], point_data['y'])
+            self.hover_label.setAnchor((0.5, 1.5))
+            self.hover_label.show()
+            
+            self.hover_point.setData([point_data['x']], [point_data['y']])
+            self.hover_point.show()
+
+    def hide_hover_info(self):
+        self._hovered = None
+        self.hover_label.hide()
+        self.hover_point.hide()
+
+
+class PortfolioGraphWindow(QDialog):
+    """Window for displaying portfolio performance graphs.
+
+    The numbers come from a PortfolioReport. Passing the ``valuation`` left
+    by a previous window lets the daily series be patched for the
+    transactions that changed since, instead of rebuilt.
+    """
+    def __init__(self, transactions, parent=None, valuation=None):
+        super().__init__(parent)
+        self.setWindowTitle("Andamento del Portafoglio")
+        self.resize(1200, 740)
+        self.transactions = transactions
+        self.valuation = valuation
+        self.report = PortfolioReport(transactions, valuation)
+        self.setup_ui()
+        self.plot()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(20, 20, 20, 20)  # Add padding
+        
+        self.table_view = QTableView()
+        self.table_view.setAlternatingRowColors(True)
+        self.table_view.verticalHeader().setDefaultSectionSize(40)  
+        self.table_view.horizontalScrollBar().setStyleSheet("""
+                QScrollBar:horizontal {
+                    height: 0px;
+                    border: 1px solid #E5E7EB;
+                    background-color: #F9FAFB;
+                    border-radius: 9px;
+                    margin: 3px 0px 3px 0px;
+                }
+                QScrollBar::handle:horizontal {
+                    background-color: #9CA3AF;
+                    border-radius: 7px;
+                    min-width: 30px;
+                    margin: 2px;
+                }
+                QScrollBar::handle:horizontal:hover {
+                    background-color: #6B7280;
+                }
+                QScrollBar::add-line:horizontal, QScrollBar::sub-line:horizontal {
+                    border: none;
+                    background: none;
+                    width: 0px;
+                }
+            """)
+        layout.addWidget(self.table_view)
+        
+        layout.addItem(QSpacerItem(20, 40, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding))
+        
+        self.inflation_checkbox = QCheckBox("Mostra serie in € reali (al netto dell'inflazione)")
+        self.inflation_checkbox.clicked.connect(self.plot)
+        checkbox_font = QFont("Segoe UI", 14, QFont.Weight.Bold)
+        self.inflation_checkbox.setFont(checkbox_font)
+        self.inflation_checkbox.setStyleSheet("QCheckBox { color: #1f2937; padding: 10px; }")
+        layout.addWidget(self.inflation_checkbox)
+        
+        plot_container = QWidget()
+        plot_layout = QHBoxLayout(plot_container)
+        plot_layout.setContentsMargins(80, 0, 80, 0)  # Increased left and right padding
+        
+        self.plot_widget = ClickablePlotWidget(self)
+        plot_layout.addWidget(self.plot_widget)
+        layout.addWidget(plot_container, 2)
+        
+        close_btn = QPushButton("Chiudi")
+        close_btn.clicked.connect(self.close)
+        layout.addWidget(close_btn)
+
+    def plot(self):
+        if not self.transactions:
+            self.plot_widget.setTitle("Nessuna transazione per visualizzare il grafico.")
+            return
+
+        try:
+            with span('graph.calculate'):
+                self.calculate_portfolio_data()
+            with span('graph.table'):
+                self.update_table()
+            with span('graph.plot'):
+                self.update_plot()
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            self.plot_widget.setTitle(f"Errore nella creazione del grafico: {e}")
+
+    def calculate_portfolio_data(self):
+        report = self.report.calculate()
+        self.valuation = report.valuation
+        self.date_range = report.date_range
+        self.plot_widget.date_range = self.date_range
+        self.invest_series = report.invest_series
+        self.market_series = report.market_series
+        self.real_invest_series = report.real_invest_series
+        self.real_market_series = report.real_market_series
+
+    def update_table(self):
+        df_table = self.report.yearly_table()
+        model = self.table_view.model()
+        if isinstance(model, PandasModel):
+            model.update_data(df_table)
+        else:
+            model = PandasModel(df_table)
+            self.table_view.setModel(model)
+            # Start unsorted, in year order; header clicks sort on the model arrays
+            self.table_view.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+            self.table_view.setSortingEnabled(True)
+        
+        # # Enhanced table styling
+        # self.table_view.resizeColumnsToContents()
+        # self.table_view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+
+        # Set minimum column widths and enable horizontal scrolling
+        header = self.table_view.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        header.setMinimumSectionSize(150)  # Minimum width for readability
+        
+        # Ensure each column has a reasonable minimum width
+        for column in range(model.columnCount()):
+            current_width = header.sectionSize(column)
+            min_width = max(150, len(str(df_table.columns[column])) * 8 + 20)  # Base on header text length
+            if current_width < min_width:
+                header.resizeSection(column, min_width)
+        
+        
+        # Set fonts
+        table_font = QFont("Segoe UI", 16)
+        header_font = QFont("Segoe UI", 17, QFont.Weight.Bold)
+        
+        self.table_view.setFont(table_font)
+        self.table_view.horizontalHeader().setFont(header_font)
+        self.table_view.verticalHeader().setFont(header_font)
+
+    def update_plot(self):
+        self.plot_widget.clear()
+        self.plot_widget.addLegend()
+        
+        # Enhanced title styling
+        title_style = {'font-size': '18px', 'font-weight': 'bold', 'color': '#1f2937'}
+        self.plot_widget.setTitle("Andamento del Portafoglio", **title_style)
+        self.plot_widget.setLabel('bottom', "Data")
+        self.plot_widget.setLabel('left', "Euro (€)")
+        
+        x_axis = np.arange(len(self.date_range))
+        
+        # Setup date axis
+        month_starts = np.flatnonzero(self.date_range.day == 1)
+        date_ticks = list(zip(month_starts.tolist(), self.date_range[month_starts].strftime("%b %y")))
+        self.plot_widget.getAxis('bottom').setTicks([date_ticks])
+        
+        # Plot main series
+        self.plot_widget.plot(
+            x_axis, self.market_series.values, 
+            pen=pg.mkPen(color='#3B82F6', width=5), 
+            name='Valore di Mercato (nominale)'
+        )
+        self.plot_widget.plot(
+            x_axis, self.invest_series.values, 
+            pen=pg.mkPen(color='#EF4444', width=5, style=Qt.PenStyle.DashLine), 
+            name='Capitale Investito (nominale)'
+        )
+        
+        # Plot inflation-adjusted series if checked
+        if self.inflation_checkbox.isChecked():
+            self.plot_widget.plot(
+                x_axis, self.real_market_series.values, 
+                pen=pg.mkPen(color='#16A34A', width=5, style=Qt.PenStyle.DotLine), 
+                name='Valore di Mercato (in € reali)'
+            )
+            self.plot_widget.plot(
+                x_axis, self.real_invest_series.values, 
+                pen=pg.mkPen(color='#111827', width=5, style=Qt.PenStyle.DashDotLine), 
+                name='Capitale Investito (in € reali)'
+            )
+        
+        # Auto-range and center the plot
+        self.plot_widget.getViewBox().autoRange()
+        self.plot_widget.getViewBox().enableAutoRange(axis='xy')
+
+
+class PandasModel(QAbstractTableModel):
+    """Table model over a snapshot of a DataFrame with centered alignment.
+
+    Columns are copied into NumPy arrays and their display strings are
+    formatted once, so painting is a plain lookup. Sorting permutes a row
+    order array, and ``update_data`` only signals the cells that changed.
+    """
+    def __init__(self, data):
+        super().__init__()
+        self._load(data)
+
+    def _load(self, data):
+        self._data = data
+        self._columns = [str(c) for c in data.columns]
+        self._labels = [str(label) for label in data.index]
+        self._arrays = [np.ascontiguousarray(data.iloc[:, col].to_numpy()) for col in range(data.shape[1])]
+        self._display = [self._format(values) for values in self._arrays]
+        self._order = np.arange(data.shape[0])
+        self._sort_column, self._sort_order = -1, Qt.SortOrder.AscendingOrder
+
+    @staticmethod
+    def _format(values):
+        if values.dtype.kind == 'f':
+            return np.char.mod('%.2f', values).tolist()
+        return [f"{v:.2f}" if isinstance(v, float) else str(v) for v in values]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._order)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._columns)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if index.isValid():
+            if role == Qt.ItemDataRole.DisplayRole:
+                return self._display[index.column()][self._order[index.row()]]
+            elif role == Qt.ItemDataRole.TextAlignmentRole:
+                return Qt.AlignmentFlag.AlignCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole:
+            if orientation == Qt.Orientation.Horizontal:
+                return self._columns[section]
+            elif orientation == Qt.Orientation.Vertical:
+                return self._labels[self._order[section]]
+        elif role == Qt.ItemDataRole.TextAlignmentRole:
+            return Qt.AlignmentFlag.AlignCenter
+        return None
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        """Sort rows by a column's values; a negative column restores the original order"""
+        self.layoutAboutToBeChanged.emit()
+        old_order = self._order
+        self._sort_column, self._sort_order = column, order
+        self._order = self._sorted_order()
+
+        # Keep selections and the current cell on the same rows
+        new_rows = np.empty_like(self._order)
+        new_rows[self._order] = np.arange(len(self._order))
+        persistent = self.persistentIndexList()
+        self.changePersistentIndexList(
+            persistent, [self.index(int(new_rows[old_order[p.row()]]), p.column()) for p in persistent]
+        )
+        self.layoutChanged.emit()
+
+    def _sorted_order(self):
+        if not 0 <= self._sort_column < len(self._arrays):
+            return np.arange(len(self._labels))
+        values = self._arrays[self._sort_column]
+        descending = self._sort_order == Qt.SortOrder.DescendingOrder
+        if values.dtype.kind in 'biuf':
+            # Negating keeps NaN last in both directions
+            return np.argsort(-values.astype(float) if descending else values, kind='stable')
+        order = np.argsort(np.array([str(v) for v in values]), kind='stable')
+        return order[::-1].copy() if descending else order
+
+    def update_data(self, data):
+        """Take new values, signalling only the changed cells when the shape is unchanged"""
+        if (data.shape != self._data.shape or [str(c) for c in data.columns] != self._columns
+                or [str(label) for label in data.index] != self._labels):
+            self.beginResetModel()
+            sort_column, sort_order = self._sort_column, self._sort_order
+            self._load(data)
+            self._sort_column, self._sort_order = sort_column, sort_order
+            self._order = self._sorted_order()
+            self.endResetModel()
+            return
+
+        self._data = data
+        changed_columns = {}
+        for col in range(data.shape[1]):
+            values = np.ascontiguousarray(data.iloc[:, col].to_numpy())
+            old = self._arrays[col]
+            if values.dtype != old.dtype:
+                changed = np.ones(len(values), dtype=bool)
+            elif values.dtype.kind == 'f':
+                changed = ~((values == old) | (np.isnan(values) & np.isnan(old)))
+            else:
+                changed = values != old
+            if not changed.any():
+                continue
+            self._arrays[col] = values
+            display = self._format(values)
+            for row in np.flatnonzero(changed):
+                self._display[col][row] = display[row]
+            changed_columns[col] = changed
+
+        if self._sort_column in changed_columns:
+            self.sort(self._sort_column, self._sort_order)
+        view_rows = np.empty_like(self._order)
+        view_rows[self._order] = np.arange(len(self._order))
+        for col, changed in changed_columns.items():
+            rows = view_rows[changed]
+            self.dataChanged.emit(
+                self.index(int(rows.min()), col), self.index(int(rows.max()), col), [Qt.ItemDataRole.DisplayRole]
+            )
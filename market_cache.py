@@ -0,0 +1,360 @@
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from diagnostics import cache_lookup, span
+from paths import data_path
+from providers import PRICE_COLUMNS, get_provider
+
+CACHE_FILE = 'market_cache.sqlite'
+# How long today's (still moving) quote is served before asking again
+LIVE_TTL_SECONDS = 15 * 60
+# Dividend histories are re-checked once a day
+DIVIDEND_TTL_SECONDS = 24 * 60 * 60
+# Minimum delay between ECB checks while a new monthly observation is due
+INFLATION_RECHECK_SECONDS = 12 * 60 * 60
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, pd.Timestamp):
+        return value.date()
+    return value
+
+
+class MarketCache:
+    """Persistent store of daily price history with incremental top-up fetches.
+
+    Each ticker keeps one contiguous covered date range. Days before today
+    are final once stored; today's row is refreshed at most every
+    LIVE_TTL_SECONDS, so a warm cache costs one small request per ticker.
+    """
+    def __init__(self, path=None):
+        self.path = path or data_path(CACHE_FILE)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS prices (
+                ticker TEXT NOT NULL,
+                date TEXT NOT NULL,
+                open REAL, high REAL, low REAL, close REAL, volume REAL,
+                PRIMARY KEY (ticker, date)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS price_coverage (
+                ticker TEXT PRIMARY KEY,
+                start TEXT NOT NULL,
+                end TEXT NOT NULL,
+                refreshed_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS dividends (
+                ticker TEXT NOT NULL,
+                paid_at TEXT NOT NULL,
+                amount REAL NOT NULL,
+                PRIMARY KEY (ticker, paid_at)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS dividend_meta (
+                ticker TEXT PRIMARY KEY,
+                checked_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS inflation (
+                code TEXT NOT NULL,
+                period TEXT NOT NULL,
+                value REAL,
+                PRIMARY KEY (code, period)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS inflation_meta (
+                code TEXT PRIMARY KEY,
+                start TEXT NOT NULL,
+                checked_at REAL NOT NULL
+            );
+        """)
+
+    def history(self, ticker, start, end, raise_errors=False):
+        """Daily OHLC history for ``ticker`` between two dates (inclusive).
+
+        Failed fetches are logged and the stored rows returned; with
+        ``raise_errors`` a range still missing afterwards raises LookupError.
+        """
+        ticker = ticker.upper()
+        start, end = _as_date(start), min(_as_date(end), date.today())
+        if start > end:
+            return pd.DataFrame(columns=PRICE_COLUMNS, index=pd.DatetimeIndex([]))
+
+        gaps = self._missing_ranges(ticker, start, end)
+        cache_lookup('prices', not gaps)
+        for gap_start, gap_end in gaps:
+            self._top_up(ticker, gap_start, gap_end)
+        if raise_errors and gaps and self._missing_ranges(ticker, start, end):
+            raise LookupError(f"Could not refresh prices for {ticker}")
+        return self._read(ticker, start, end)
+
+    def last_close(self, ticker):
+        """Most recent close, refreshing only the last few days"""
+        return self.last_quote(ticker)[0]
+
+    def last_quote(self, ticker, raise_errors=False):
+        """Most recent close and its trading date, refreshing only the last few days"""
+        today = date.today()
+        self.history(ticker, today - timedelta(days=7), today, raise_errors)
+        return self.cached_quote(ticker)
+
+    def last_closes(self, tickers):
+        """Most recent close for several tickers, {ticker: close or None}"""
+        return {ticker: close for ticker, (close, _) in self.last_quotes(tickers).items()}
+
+    def last_quotes(self, tickers):
+        """Most recent close for several tickers with a single batched top-up.
+
+        Returns {ticker: (close, trading date)}, (None, None) without a
+        price. If the batched request fails, each ticker falls back to its
+        own request so one bad symbol cannot block the others.
+        """
+        today = date.today()
+        window_start = today - timedelta(days=7)
+        tickers = [t.upper() for t in tickers]
+
+        stale = {}
+        for ticker in tickers:
+            gaps = self._missing_ranges(ticker, window_start, today)
+            cache_lookup('quotes', not gaps)
+            if gaps:
+                stale[ticker] = min(gap[0] for gap in gaps)
+
+        if stale:
+            fetch_start = min(stale.values())
+            try:
+                with span('fetch.history_many', 'network', tickers=len(stale)):
+                    frames = get_provider().history_many(list(stale), start=fetch_start, end=today + timedelta(days=1))
+            except Exception as e:
+                print(f"Batched quote error: {e}")
+                frames = {}
+            for ticker in stale:
+                if ticker in frames:
+                    self._store(ticker, frames[ticker], fetch_start, today)
+                else:
+                    self.history(ticker, window_start, today)
+
+        return {ticker: self.cached_quote(ticker) for ticker in tickers}
+
+    def cached_close(self, ticker):
+        """Latest stored close without any network access"""
+        return self.cached_quote(ticker)[0]
+
+    def cached_quote(self, ticker):
+        """Latest stored close and its trading date, (None, None) without one"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT close, date FROM prices WHERE ticker = ? AND date <= ? ORDER BY date DESC LIMIT 1",
+                (ticker.upper(), date.today().isoformat()),
+            ).fetchone()
+        if not row or row[0] is None:
+            return None, None
+        return float(row[0]), date.fromisoformat(row[1])
+
+    def close_near(self, ticker, day):
+        """Close of the last session within a few days of ``day``, else the latest close"""
+        day = _as_date(day)
+        hist = self.history(ticker, day - timedelta(days=3), day + timedelta(days=3))
+        if not hist.empty:
+            return float(hist['Close'].iloc[-1])
+        return self.last_close(ticker)
+
+    def dividends(self, ticker):
+        """Full dividend history (tz-naive UTC index), refreshed at most daily"""
+        ticker = ticker.upper()
+        with self._lock:
+            meta = self._conn.execute(
+                "SELECT checked_at FROM dividend_meta WHERE ticker = ?", (ticker,)
+            ).fetchone()
+
+        fresh = meta is not None and time.time() - meta[0] < DIVIDEND_TTL_SECONDS
+        cache_lookup('dividends', fresh)
+        if not fresh:
+            try:
+                with span('fetch.dividends', 'network', ticker=ticker):
+                    dividends = get_provider().dividends(ticker)
+            except Exception as e:
+                print(f"Dividend data error for {ticker}: {e}")
+            else:
+                with self._lock, self._conn:
+                    stored = self._conn.execute(
+                        "SELECT COUNT(*) FROM dividends WHERE ticker = ?", (ticker,)
+                    ).fetchone()[0]
+                    # Offline or throttled, yfinance answers with an empty series:
+                    # keep the stored history and ask again on the next call
+                    if not (dividends.empty and stored):
+                        self._conn.execute("DELETE FROM dividends WHERE ticker = ?", (ticker,))
+                        self._conn.executemany(
+                            "INSERT OR REPLACE INTO dividends VALUES (?, ?, ?)",
+                            [(ticker, ts.isoformat(), float(v)) for ts, v in dividends.items()],
+                        )
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO dividend_meta VALUES (?, ?)", (ticker, time.time())
+                        )
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT paid_at, amount FROM dividends WHERE ticker = ? ORDER BY paid_at", (ticker,)
+            ).fetchall()
+        return pd.Series([r[1] for r in rows], index=pd.DatetimeIndex([r[0] for r in rows]),
+                         name='Dividends', dtype=float)
+
+    def inflation(self, series_code, start, end):
+        """Monthly observations of an ECB series as TIME_PERIOD/OBS_VALUE rows.
+
+        Stored months are served from disk. The ECB is only asked for months
+        after the last stored observation, once the previous month may have
+        been published, and at most every INFLATION_RECHECK_SECONDS. Without
+        network access the stored observations are returned as they are.
+        """
+        start_month, end_month = _as_date(start).strftime('%Y-%m'), _as_date(end).strftime('%Y-%m')
+        with self._lock:
+            meta = self._conn.execute(
+                "SELECT start, checked_at FROM inflation_meta WHERE code = ?", (series_code,)
+            ).fetchone()
+            last = self._conn.execute(
+                "SELECT MAX(period) FROM inflation WHERE code = ?", (series_code,)
+            ).fetchone()[0]
+
+        # Observations lag by a month: the latest one we can expect is last month's
+        expected = (date.today().replace(day=1) - timedelta(days=1)).strftime('%Y-%m')
+        expected = min(expected, end_month)
+        recheck_due = meta is not None and time.time() - meta[1] >= INFLATION_RECHECK_SECONDS
+        if meta is None or start_month < meta[0]:
+            self._fetch_inflation(series_code, start_month, end_month, start_month)
+        elif last is None and recheck_due:
+            self._fetch_inflation(series_code, meta[0], end_month, meta[0])
+        elif last is not None and last < expected and recheck_due:
+            next_month = (date.fromisoformat(last + '-01') + timedelta(days=32)).strftime('%Y-%m')
+            self._fetch_inflation(series_code, next_month, end_month, meta[0])
+        else:
+            cache_lookup('inflation', True)
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT period, value FROM inflation WHERE code = ? AND period BETWEEN ? AND ? ORDER BY period",
+                (series_code, start_month, end_month),
+            ).fetchall()
+        return pd.DataFrame(rows, columns=['TIME_PERIOD', 'OBS_VALUE'])
+
+    def _fetch_inflation(self, series_code, start_month, end_month, covered_start):
+        cache_lookup('inflation', False)
+        try:
+            with span('fetch.inflation', 'network', series=series_code, start=start_month, end=end_month):
+                infl_df = get_provider().inflation(series_code, start_month, end_month)
+        except Exception as e:
+            print(f"Inflation data error: {e}")
+            infl_df = None
+
+        with self._lock, self._conn:
+            if infl_df is not None and not infl_df.empty:
+                periods = pd.to_datetime(infl_df['TIME_PERIOD']).dt.strftime('%Y-%m')
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO inflation VALUES (?, ?, ?)",
+                    [(series_code, p, float(v)) for p, v in zip(periods, infl_df['OBS_VALUE'])],
+                )
+            if infl_df is not None:
+                row = self._conn.execute(
+                    "SELECT start FROM inflation_meta WHERE code = ?", (series_code,)
+                ).fetchone()
+                new_start = min(covered_start, row[0]) if row else covered_start
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO inflation_meta VALUES (?, ?, ?)",
+                    (series_code, new_start, time.time()),
+                )
+
+    def _missing_ranges(self, ticker, start, end):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT start, end, refreshed_at FROM price_coverage WHERE ticker = ?", (ticker,)
+            ).fetchone()
+        if row is None:
+            return [(start, end)]
+
+        covered_start, covered_end = date.fromisoformat(row[0]), date.fromisoformat(row[1])
+        gaps = []
+        if start < covered_start:
+            gaps.append((start, covered_start - timedelta(days=1)))
+        if end > covered_end:
+            live_only = covered_end >= date.today() - timedelta(days=1)
+            if not (live_only and time.time() - row[2] < LIVE_TTL_SECONDS):
+                gaps.append((covered_end + timedelta(days=1), end))
+        return gaps
+
+    def _top_up(self, ticker, start, end):
+        try:
+            with span('fetch.history', 'network', ticker=ticker, start=start, end=end):
+                hist = get_provider().history(ticker, start=start, end=end + timedelta(days=1))
+        except Exception as e:
+            print(f"Price history error for {ticker}: {e}")
+            return
+        self._store(ticker, hist, start, end)
+
+    def _store(self, ticker, hist, start, end):
+        rows = []
+        if not hist.empty:
+            frame = hist.reindex(columns=PRICE_COLUMNS)
+            for ts, values in zip(hist.index, frame.itertuples(index=False)):
+                rows.append((ticker, ts.strftime('%Y-%m-%d'), *[None if pd.isna(v) else float(v) for v in values]))
+
+        # Only days before today are final, today's row stays refreshable
+        final_end = min(end, date.today() - timedelta(days=1))
+        if not rows and start <= final_end and len(pd.bdate_range(start, final_end)):
+            # yfinance answers a failed request with an empty frame: weekdays
+            # without a single row are a miss, not a range known to be empty
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            row = self._conn.execute(
+                "SELECT start, end FROM price_coverage WHERE ticker = ?", (ticker,)
+            ).fetchone()
+            if row is None:
+                new_start, new_end = start, max(final_end, start - timedelta(days=1))
+            else:
+                new_start = min(start, date.fromisoformat(row[0]))
+                new_end = max(final_end, date.fromisoformat(row[1]))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO price_coverage VALUES (?, ?, ?, ?)",
+                (ticker, new_start.isoformat(), new_end.isoformat(), time.time()),
+            )
+
+    def _read(self, ticker, start, end):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT date, open, high, low, close, volume FROM prices "
+                "WHERE ticker = ? AND date BETWEEN ? AND ? ORDER BY date",
+                (ticker, start.isoformat(), end.isoformat()),
+            ).fetchall()
+        index = pd.DatetimeIndex([r[0] for r in rows])
+        return pd.DataFrame([r[1:] for r in rows], index=index, columns=PRICE_COLUMNS, dtype=float)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_market_cache():
+    """Shared MarketCache stored next to transactions.json.
+
+    Replay and record runs use an in-memory cache: replays never mix with
+    live data, and recordings request everything through the provider
+    instead of being served from the on-disk cache.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = MarketCache(':memory:' if get_provider().name in ('replay', 'record') else None)
+        return _cache
+
+
+def set_market_cache(cache):
+    """Replace the shared cache, e.g. with an in-memory one for benchmarks"""
+    global _cache
+    with _cache_lock:
+        _cache = cache
@@ -0,0 +1,17 @@
+import os
+import sys
+
+
+def get_app_dir():
+    """Directory holding the executable (frozen build) or the sources"""
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def data_path(filename):
+    """Path of a data file stored next to transactions.json.
+
+    FINANCEAPP_DATA_DIR moves every data file elsewhere, e.g. for benchmarks.
+    """
+    return os.path.join(os.environ.get('FINANCEAPP_DATA_DIR') or get_app_dir(), filename)
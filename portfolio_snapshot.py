@@ -0,0 +1,96 @@
+import json
+import os
+import time
+from datetime import date, datetime, timedelta
+
+from paths import data_path
+
+SNAPSHOT_FILE = 'portfolio_snapshot.json'
+
+
+class PortfolioSnapshot:
+    """Last known quote, value and P/L of every ticker, saved between runs.
+
+    The main window renders from it before any market data is loaded and
+    then revalidates in the background. Only the EUR price is reused: values
+    are recomputed from the current holdings, so transactions added since
+    the snapshot are still counted right. Each row remembers how recent its
+    quote is (see ``quote_time``), so a failed refresh that falls back to an
+    old stored close does not make it look new.
+    """
+    def __init__(self, path=None):
+        self.path = path or data_path(SNAPSHOT_FILE)
+        self.saved_at = None
+        self.rows = {}
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.saved_at = float(data['saved_at'])
+            self.rows = {ticker: row for ticker, row in data['rows'].items()
+                         if row.get('price_eur') is not None and 'as_of' in row}
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+            self.saved_at, self.rows = None, {}
+        return self
+
+    def save(self, rows, quote_times):
+        """Write ``{ticker: (price_eur, (shares, value, pl, pl_pct, avg_price))}`` atomically.
+
+        ``quote_times`` maps the tickers quoted by the last refresh to the
+        time of their quote; the others keep the time of their previous row,
+        or are left out without one.
+        """
+        now = time.time()
+        saved = {}
+        for ticker, (price, values) in rows.items():
+            previous = self.rows.get(ticker)
+            if price is None:
+                continue
+            if ticker in quote_times:
+                as_of = quote_times[ticker]
+            elif previous is not None and previous['price_eur'] == price:
+                as_of = previous['as_of']
+            else:
+                continue
+            saved[ticker] = {'price_eur': price, 'shares': values[0], 'value': values[1],
+                             'pl': values[2], 'pl_pct': values[3], 'as_of': as_of}
+        self.saved_at, self.rows = now, saved
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'saved_at': self.saved_at, 'rows': self.rows}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Snapshot save error: {e}")
+
+    def prices(self):
+        return {ticker: row['price_eur'] for ticker, row in self.rows.items()}
+
+    def age(self):
+        """Seconds since the oldest quote in the snapshot, or None without one"""
+        if not self.rows:
+            return None
+        return max(time.time() - min(row['as_of'] for row in self.rows.values()), 0.0)
+
+
+def quote_time(close_date, now=None):
+    """Epoch time a close stands for: now when it is from the latest session,
+    otherwise the end of its trading day"""
+    now = time.time() if now is None else now
+    latest_session = date.fromtimestamp(now)
+    while latest_session.weekday() >= 5:
+        latest_session -= timedelta(days=1)
+    if close_date >= latest_session:
+        return now
+    return min(now, datetime.combine(close_date + timedelta(days=1), datetime.min.time()).timestamp())
+
+
+def format_age(seconds):
+    """Italian description of an age, e.g. '3 ore fa'"""
+    if seconds < 60:
+        return "pochi secondi fa"
+    for size, one, many in ((86400, "giorno", "giorni"), (3600, "ora", "ore"), (60, "minuto", "minuti")):
+        if seconds >= size:
+            count = int(seconds // size)
+            return f"{count} {one if count == 1 else many} fa"
@@ -0,0 +1,295 @@
+import json
+import os
+import threading
+import urllib.parse
+
+import pandas as pd
+
+from paths import data_path
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+SEARCH_URL = "https://query1.finance.yahoo.com/v1/finance/search"
+
+
+class FixtureMissingError(LookupError):
+    """Raised by ReplayProvider when no fixture was recorded for a request"""
+
+
+def _naive_index(index):
+    index = pd.to_datetime(index)
+    return index.tz_localize(None) if index.tz is not None else index
+
+
+def _slice_history(hist, start=None, end=None, period=None):
+    """Apply yfinance-style start/end (end exclusive) or '<n>d' period selection"""
+    if start is not None:
+        hist = hist[hist.index >= pd.Timestamp(start)]
+    if end is not None:
+        hist = hist[hist.index < pd.Timestamp(end)]
+    if period is not None and start is None and end is None:
+        hist = hist.tail(int(period.rstrip('d')))
+    return hist
+
+
+class MarketDataProvider:
+    """Source of quotes, price history, dividends, FX, inflation and symbol search.
+
+    History frames have a tz-naive daily index and PRICE_COLUMNS; dividend
+    series are indexed by tz-naive UTC timestamps.
+    """
+    name = 'base'
+
+    def history(self, ticker, start=None, end=None, period=None):
+        raise NotImplementedError
+
+    def dividends(self, ticker):
+        raise NotImplementedError
+
+    def inflation(self, series_code, start, end):
+        raise NotImplementedError
+
+    def search(self, query):
+        raise NotImplementedError
+
+    def history_many(self, tickers, start=None, end=None, period=None):
+        """History for several tickers as {ticker: frame}; failing tickers are left out"""
+        frames = {}
+        for ticker in tickers:
+            try:
+                frames[ticker] = self.history(ticker, start=start, end=end, period=period)
+            except Exception as e:
+                print(f"History error for {ticker}: {e}")
+        return frames
+
+    def quote(self, ticker):
+        """Last close of the most recent sessions, or None"""
+        hist = self.history(ticker, period='5d')
+        return float(hist['Close'].iloc[-1]) if not hist.empty else None
+
+    def fx_rate(self, base='EUR', quote='USD'):
+        """Spot exchange rate quoted as units of ``quote`` per ``base``"""
+        return self.quote(f"{base}{quote}=X")
+
+
+# yf.download keeps its results in module globals it resets on every call,
+# so two downloads running at once wipe or mix each other's frames
+_download_lock = threading.Lock()
+
+
+class LiveProvider(MarketDataProvider):
+    """yfinance for prices and dividends, Yahoo search, ECB for inflation.
+
+    The network libraries are imported on first use, they are slow to load.
+    """
+    name = 'live'
+
+    def __init__(self):
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """Keep-alive HTTP session reused by every search request"""
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                self._session = requests.Session()
+                self._session.headers.update({'User-Agent': 'Mozilla/5.0'})
+            return self._session
+
+    def history(self, ticker, start=None, end=None, period=None):
+        import yfinance as yf
+        if period is not None:
+            hist = yf.Ticker(ticker).history(period=period)
+        else:
+            hist = yf.Ticker(ticker).history(start=start, end=end)
+        hist = hist.reindex(columns=PRICE_COLUMNS)
+        hist.index = _naive_index(hist.index)
+        return hist
+
+    def history_many(self, tickers, start=None, end=None, period=None):
+        """One batched yfinance download for all tickers"""
+        import yfinance as yf
+        tickers = list(tickers)
+        with _download_lock:
+            data = yf.download(
+                tickers, start=start, end=end, period=period, group_by='ticker',
+                auto_adjust=True, threads=True, progress=False,
+            )
+        frames = {}
+        for ticker in tickers:
+            if isinstance(data.columns, pd.MultiIndex):
+                if ticker not in data.columns.get_level_values(0):
+                    continue
+                hist = data[ticker]
+            else:
+                hist = data
+            hist = hist.reindex(columns=PRICE_COLUMNS).dropna(how='all')
+            if hist.empty:
+                # Failed downloads come back as all-NaN columns
+                continue
+            hist.index = _naive_index(hist.index)
+            frames[ticker] = hist
+        return frames
+
+    def dividends(self, ticker):
+        import yfinance as yf
+        dividends = yf.Ticker(ticker).dividends
+        dividends.index = dividends.index.tz_convert(None) if dividends.index.tz else dividends.index
+        return dividends
+
+    def inflation(self, series_code, start, end):
+        from ecbdata import ecbdata
+        return ecbdata.get_series(series_code, start=start, end=end)
+
+    def search(self, query):
+        url = f"{SEARCH_URL}?q={urllib.parse.quote(query)}"
+        response = self.session.get(url, timeout=10)
+        response.raise_for_status()
+        return response.json().get('quotes', [])
+
+
+class ReplayProvider(MarketDataProvider):
+    """Serves every request from fixture files, never touching the network.
+
+    Fixtures live under ``fixture_dir/<kind>/<key>.json``. Price history is
+    stored as one frame per ticker and sliced per request, so replays do not
+    depend on the date they run.
+    """
+    name = 'replay'
+
+    def __init__(self, fixture_dir):
+        self.fixture_dir = fixture_dir
+
+    def fixture_path(self, kind, key):
+        return os.path.join(self.fixture_dir, kind, urllib.parse.quote(key, safe='') + '.json')
+
+    def _load(self, kind, key):
+        path = self.fixture_path(kind, key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise FixtureMissingError(f"No {kind} fixture for {key!r} in {self.fixture_dir}")
+
+    def history(self, ticker, start=None, end=None, period=None):
+        data = self._load('history', ticker.upper())
+        hist = pd.DataFrame(data['data'], index=pd.DatetimeIndex(data['index']), columns=data['columns'])
+        return _slice_history(hist.reindex(columns=PRICE_COLUMNS).astype(float), start, end, period)
+
+    def dividends(self, ticker):
+        data = self._load('dividends', ticker.upper())
+        return pd.Series(data['data'], index=pd.DatetimeIndex(data['index']), name='Dividends', dtype=float)
+
+    def inflation(self, series_code, start, end):
+        infl_df = pd.DataFrame(self._load('inflation', series_code))
+        periods = infl_df['TIME_PERIOD']
+        return infl_df[(periods >= start) & (periods <= end)].reset_index(drop=True)
+
+    def search(self, query):
+        return self._load('search', query.strip().lower())
+
+
+class RecordingProvider(ReplayProvider):
+    """Forwards requests to another provider and writes the answers as fixtures"""
+    name = 'record'
+
+    def __init__(self, fixture_dir, inner=None):
+        super().__init__(fixture_dir)
+        self.inner = inner or LiveProvider()
+        self._lock = threading.Lock()
+
+    def _save(self, kind, key, payload):
+        path = self.fixture_path(kind, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def history(self, ticker, start=None, end=None, period=None):
+        hist = self.inner.history(ticker, start=start, end=end, period=period)
+        self._record_history(ticker, hist)
+        return hist
+
+    def _record_history(self, ticker, hist):
+        with self._lock:
+            # Merge with earlier recordings so one file covers every range seen
+            try:
+                recorded = super().history(ticker)
+                merged = pd.concat([recorded, hist])
+                merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+            except FixtureMissingError:
+                merged = hist
+            self._save('history', ticker.upper(), {
+                'columns': list(merged.columns),
+                'index': [ts.isoformat() for ts in merged.index],
+                'data': merged.astype(float).where(merged.notna(), None).values.tolist(),
+            })
+
+    def history_many(self, tickers, start=None, end=None, period=None):
+        frames = self.inner.history_many(tickers, start=start, end=end, period=period)
+        for ticker, hist in frames.items():
+            self._record_history(ticker, hist)
+        return frames
+
+    def dividends(self, ticker):
+        dividends = self.inner.dividends(ticker)
+        with self._lock:
+            self._save('dividends', ticker.upper(), {
+                'index': [ts.isoformat() for ts in dividends.index],
+                'data': [float(v) for v in dividends.values],
+            })
+        return dividends
+
+    def inflation(self, series_code, start, end):
+        infl_df = self.inner.inflation(series_code, start, end)
+        with self._lock:
+            try:
+                recorded = pd.DataFrame(self._load('inflation', series_code))
+            except FixtureMissingError:
+                recorded = pd.DataFrame(columns=['TIME_PERIOD', 'OBS_VALUE'])
+            rows = infl_df[['TIME_PERIOD', 'OBS_VALUE']].copy()
+            rows['TIME_PERIOD'] = rows['TIME_PERIOD'].astype(str)
+            merged = pd.concat([recorded, rows]).drop_duplicates('TIME_PERIOD', keep='last').sort_values('TIME_PERIOD')
+            self._save('inflation', series_code, merged.to_dict(orient='list'))
+        return infl_df
+
+    def search(self, query):
+        quotes = self.inner.search(query)
+        with self._lock:
+            self._save('search', query.strip().lower(), quotes)
+        return quotes
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def create_provider(mode=None, fixture_dir=None):
+    """Build a provider from FINANCEAPP_PROVIDER (live, record, replay) and FINANCEAPP_FIXTURES"""
+    mode = (mode or os.environ.get('FINANCEAPP_PROVIDER', 'live')).lower()
+    fixture_dir = fixture_dir or os.environ.get('FINANCEAPP_FIXTURES') or data_path('fixtures')
+    if mode == 'live':
+        return LiveProvider()
+    if mode == 'record':
+        return RecordingProvider(fixture_dir)
+    if mode == 'replay':
+        return ReplayProvider(fixture_dir)
+    raise ValueError(f"Unknown market data provider: {mode}")
+
+
+def get_provider():
+    """Process-wide market data provider"""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = create_provider()
+        return _provider
+
+
+def set_provider(provider):
+    """Replace the process-wide provider, e.g. with a ReplayProvider for benchmarks"""
+    global _provider
+    with _provider_lock:
+        _provider = provider
@@ -0,0 +1,178 @@
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from diagnostics import span
+from market_cache import get_market_cache
+from utils import get_eur_usd_series, get_inflation_rate_annual
+from valuation import (
+    SERIES_NAMES, PortfolioValuation, compute_daily_series, compute_yearly_dividends, transactions_frame,
+)
+
+
+class PortfolioReport:
+    """Portfolio valuation pipeline: daily series, yearly table and dividends.
+
+    Shared by PortfolioGraphWindow and the headless ``--report`` mode, so it
+    must not import PyQt6. Passing the ``valuation`` of an earlier report
+    lets the daily series be patched instead of rebuilt.
+    """
+    def __init__(self, transactions, valuation=None):
+        self.transactions = transactions
+        self.valuation = valuation
+
+    def calculate(self):
+        tx_df = transactions_frame(self.transactions)
+
+        self.first_ts = tx_df['datetime'].min().normalize()
+        self.end_ts = pd.to_datetime(datetime.utcnow()).normalize()
+        self.date_range = pd.date_range(start=self.first_ts, end=self.end_ts, freq='D')
+
+        with span('report.inflation'):
+            self.inflation_daily_series, self.annual_infl = get_inflation_rate_annual(self.first_ts, self.end_ts)
+        with span('report.eur_usd'):
+            self.eurusd_series = get_eur_usd_series(self.first_ts, self.end_ts)
+        
+        # Calculate yearly dividends
+        with span('report.dividends'):
+            self.yearly_dividends = self.calculate_yearly_dividends(tx_df)
+        
+        # Get ticker prices; tickers without any history would be valued at 0
+        self.ticker_prices = {}
+        self.ticker_yearly_values = {}
+        self.missing_prices = []
+        
+        tickers_list = sorted(tx_df['ticker'].unique())
+        market_cache = get_market_cache()
+
+        with span('report.prices', tickers=len(tickers_list)):
+            for ticker in tickers_list:
+                hist = market_cache.history(ticker, self.first_ts.date(), self.end_ts.date())
+                if not hist.empty:
+                    price_usd = hist['Close']
+                    price_eur = price_usd / self.eurusd_series.reindex(price_usd.index).to_numpy()
+                    self.ticker_prices[ticker] = price_eur.reindex(
+                        self.date_range, method='ffill'
+                    ).fillna(0.0)
+
+                    self.ticker_yearly_values[ticker] = price_eur.resample('YE').last()
+                else:
+                    self.missing_prices.append(ticker)
+
+        # Calculate daily portfolio values
+        with span('report.daily_values', transactions=len(self.transactions)):
+            self.calculate_daily_values(tx_df)
+        return self
+
+    def get_dividend_data(self, ticker, start_date, end_date):
+        """Get dividend data for a ticker between dates, converted at each payment date's rate"""
+        try:
+            # Get dividend history (tz-naive index, cached on disk)
+            dividends = get_market_cache().dividends(ticker)
+            if dividends.empty:
+                return pd.Series(dtype=float)
+            
+            # Filter dividends within date range
+            mask = (dividends.index >= pd.Timestamp(start_date)) & (dividends.index <= pd.Timestamp(end_date))
+            filtered_dividends = dividends[mask]
+            
+            # Convert to EUR (assuming USD dividends)
+            eurusd = self.eurusd_series.reindex(filtered_dividends.index.normalize()).to_numpy()
+            filtered_dividends_eur = filtered_dividends / eurusd
+            
+            return filtered_dividends_eur
+        except Exception as e:
+            print(f"Dividend data error for {ticker}: {e}")
+            return pd.Series(dtype=float)
+
+    def calculate_yearly_dividends(self, tx_df):
+        """Calculate yearly dividends for each ticker (years x tickers)"""
+        dividends_by_ticker = {
+            ticker: self.get_dividend_data(ticker, self.first_ts, self.end_ts)
+            for ticker in tx_df['ticker'].unique()
+        }
+        return compute_yearly_dividends(tx_df, dividends_by_ticker, self.annual_infl.index)
+
+    def calculate_daily_values(self, tx_df):
+        if not all('id' in tx for tx in self.transactions):
+            series = compute_daily_series(tx_df, self.date_range, self.ticker_prices, self.inflation_daily_series)
+        else:
+            sources = (self.transactions, self.date_range, self.ticker_prices, self.inflation_daily_series)
+            if self.valuation is None or not self.valuation.sync(*sources):
+                self.valuation = PortfolioValuation(*sources)
+            series = self.valuation.series(self.date_range)
+        self.invest_series = series['invest_series']
+        self.market_series = series['market_series']
+        self.real_invest_series = series['real_invest_series']
+        self.real_market_series = series['real_market_series']
+
+    def daily_table(self):
+        """The four daily series as one DataFrame indexed by date"""
+        return pd.DataFrame({name: getattr(self, name) for name in SERIES_NAMES})
+
+    def yearly_table(self):
+        """Year-by-year summary shown in the graph window"""
+        yearly_capital = self.market_series.resample('YE').last()
+        yearly_real_capital = self.real_market_series.resample('YE').last()
+        yearly_returns = yearly_capital.pct_change().fillna(0)
+
+        yearly_investment = self.invest_series.resample('YE').last()
+        yearly_gains = yearly_capital - yearly_investment
+        yearly_gains_returns =  (yearly_gains.diff()/yearly_gains.shift().abs()).fillna(0)
+
+        # Calculate total dividends per year
+        total_yearly_dividends = pd.Series(0.0, index=self.annual_infl.index)
+        for ticker, ticker_divs in self.yearly_dividends.items():
+            total_yearly_dividends += ticker_divs
+        
+        # Get average price for display (simplified approach)
+        if self.ticker_yearly_values:
+            first_ticker = list(self.ticker_yearly_values.keys())[0]
+            prices = self.ticker_yearly_values[first_ticker] if len(self.ticker_yearly_values) == 1 else pd.Series([0])
+        else:
+            prices = pd.Series([0])
+
+
+        table_data = {
+            'Prezzo per azione (EUR)': prices.values, 
+            'Capitale nominale (EUR)': yearly_capital.values,
+            'Capitale reale (EUR)': yearly_real_capital.values,
+            'Rendimento %': yearly_returns.values * 100,
+            'Guadagno nominale (EUR)': yearly_gains.values,
+            'Guadagno annualizzato %': yearly_gains_returns.values * 100,
+            'Inflazione %': self.annual_infl.values * 100,
+            'Dividendi (EUR)': total_yearly_dividends.values
+        }
+
+        if len(self.ticker_yearly_values) > 1:
+            del table_data['Prezzo per azione (EUR)']
+        
+        return pd.DataFrame(table_data, index=self.annual_infl.index)
+
+    def write(self, output_dir, fmt='csv'):
+        """Write the daily series and the yearly table; returns the written paths"""
+        daily, yearly = self.daily_table(), self.yearly_table()
+        daily.index.name, yearly.index.name = 'date', 'year'
+        paths = []
+        if fmt in ('csv', 'both'):
+            paths.append(_write_text(output_dir, 'daily_series.csv', daily.to_csv(float_format='%.6f')))
+            paths.append(_write_text(output_dir, 'yearly_table.csv', yearly.to_csv(float_format='%.6f')))
+        if fmt in ('json', 'both'):
+            daily_json = daily.reset_index()
+            daily_json['date'] = daily_json['date'].dt.strftime('%Y-%m-%d')
+            paths.append(_write_text(output_dir, 'daily_series.json', daily_json.to_json(orient='records')))
+            paths.append(_write_text(
+                output_dir, 'yearly_table.json', yearly.reset_index().to_json(orient='records', force_ascii=False)
+            ))
+        return paths
+
+
+def _write_text(output_dir, filename, text):
+    """Write atomically so a cron run never leaves half a file behind"""
+    path = os.path.join(output_dir, filename)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return path
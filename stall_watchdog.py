@@ -0,0 +1,146 @@
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+
+from PyQt6.QtCore import QObject, QTimer
+
+from diagnostics import get_tracer
+from paths import data_path
+
+WATCHDOG_ENV = 'FINANCEAPP_WATCHDOG_MS'
+REPORT_FILE = 'stall_report.json'
+HEARTBEAT_MS = 50
+STACK_DEPTH = 12
+
+
+class StallReport:
+    """Stalls aggregated by the main-thread stack captured when they started"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def add(self, stack, duration):
+        key = tuple(stack)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {'stack': list(stack), 'count': 0, 'total_s': 0.0, 'max_s': 0.0}
+            entry['count'] += 1
+            entry['total_s'] += duration
+            entry['max_s'] = max(entry['max_s'], duration)
+
+    def worst(self, limit=None):
+        """Entries with the most total stall time first"""
+        with self._lock:
+            entries = [dict(e) for e in self._entries.values()]
+        entries.sort(key=lambda e: e['total_s'], reverse=True)
+        return entries[:limit] if limit else entries
+
+    def write(self, path):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.worst(), f, indent=2)
+        os.replace(tmp_path, path)
+
+
+class StallWatchdog(QObject):
+    """Detects when the GUI thread stops processing events.
+
+    A QTimer on the GUI thread stamps a heartbeat every HEARTBEAT_MS. A
+    daemon thread checks the stamp; once it is older than ``threshold_ms``
+    the GUI thread's Python stack is captured. The stall is recorded in the
+    report and as a ``ui.stall`` span when the next heartbeat arrives.
+    """
+    def __init__(self, threshold_ms, parent=None):
+        super().__init__(parent)
+        self.threshold = threshold_ms / 1000
+        self.report = StallReport()
+        self._lock = threading.Lock()
+        self._main_ident = threading.main_thread().ident
+        self._last_beat = time.perf_counter()
+        self._stall_stack = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._timer = QTimer(self)
+        self._timer.setInterval(HEARTBEAT_MS)
+        self._timer.timeout.connect(self._beat)
+
+    def start(self):
+        self._last_beat = time.perf_counter()
+        self._timer.start()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name='stall-watchdog', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._timer.stop()
+        self._stop.set()
+
+    def _beat(self):
+        now = time.perf_counter()
+        with self._lock:
+            last, stack = self._last_beat, self._stall_stack
+            self._last_beat, self._stall_stack = now, None
+        if stack is not None:
+            duration = now - last
+            self.report.add(stack, duration)
+            get_tracer().add_span('ui.stall', 'stall', last, now, args={'where': stack[-1] if stack else '?'})
+
+    def _watch(self):
+        interval = min(self.threshold / 2, HEARTBEAT_MS / 1000)
+        while not self._stop.wait(interval):
+            with self._lock:
+                stalled = self._stall_stack is None and time.perf_counter() - self._last_beat > self.threshold
+            if stalled:
+                stack = self._capture()
+                with self._lock:
+                    if self._stall_stack is None:
+                        self._stall_stack = stack
+
+    def _capture(self):
+        frame = sys._current_frames().get(self._main_ident)
+        if frame is None:
+            return ['<no frame>']
+        return [
+            f"{os.path.basename(f.filename)}:{f.lineno} {f.name}"
+            for f in traceback.extract_stack(frame)[-STACK_DEPTH:]
+        ]
+
+
+_watchdog = None
+
+
+def get_watchdog():
+    """The running StallWatchdog, or None when it was not enabled"""
+    return _watchdog
+
+
+def start_watchdog_from_env(app):
+    """Start a StallWatchdog when FINANCEAPP_WATCHDOG_MS is set; returns it or None.
+
+    The aggregated report is written to ``stall_report.json`` on quit.
+    """
+    value = os.environ.get(WATCHDOG_ENV)
+    if not value:
+        return None
+    try:
+        threshold_ms = float(value)
+    except ValueError:
+        print(f"Invalid {WATCHDOG_ENV}: {value}")
+        return None
+
+    global _watchdog
+    watchdog = _watchdog = StallWatchdog(threshold_ms, app)
+    watchdog.start()
+
+    def write_report():
+        watchdog.stop()
+        try:
+            watchdog.report.write(data_path(REPORT_FILE))
+        except OSError as e:
+            print(f"Stall report error: {e}")
+    app.aboutToQuit.connect(write_report)
+    return watchdog
@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+from collections import OrderedDict, deque
+
+from diagnostics import cache_lookup, span
+from paths import data_path
+from providers import get_provider
+
+INDEX_FILE = 'symbols.json'
+QUERY_CACHE_SIZE = 256
+MAX_RESULTS = 15
+
+
+class LRUCache:
+    """Small thread-safe LRU mapping used for search results"""
+    def __init__(self, maxsize=QUERY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SymbolIndex:
+    """Prefix trie over ticker symbols and the words of their long names.
+
+    Entries come from past search results and held tickers and are persisted
+    to ``symbols.json`` so prefixes complete from memory before any request.
+    """
+    def __init__(self, path=None):
+        self.path = path or data_path(INDEX_FILE)
+        self._names = {}
+        self._root = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        for entry in entries:
+            self.add(entry['symbol'], entry.get('longname') or '')
+        self._dirty = False
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = [{'symbol': s, 'longname': n} for s, n in sorted(self._names.items())]
+            self._dirty = False
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Symbol index save error: {e}")
+
+    def add(self, symbol, longname=''):
+        symbol = symbol.upper()
+        with self._lock:
+            if self._names.get(symbol) == longname or (symbol in self._names and not longname):
+                return
+            self._names[symbol] = longname
+            self._dirty = True
+            keys = {symbol.lower(), longname.lower()}
+            keys.update(word for word in longname.lower().split() if len(word) > 1)
+            for key in keys:
+                if key:
+                    self._insert(key, symbol)
+
+    def add_quotes(self, quotes):
+        for item in quotes:
+            if 'symbol' in item:
+                self.add(item['symbol'], item.get('longname', item.get('shortname', '')) or '')
+
+    def _insert(self, key, symbol):
+        node = self._root
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node.setdefault(None, set()).add(symbol)
+
+    def complete(self, prefix, limit=MAX_RESULTS):
+        """Entries whose symbol or a long-name word starts with ``prefix``"""
+        prefix = prefix.strip().lower()
+        with self._lock:
+            node = self._root
+            for ch in prefix:
+                node = node.get(ch)
+                if node is None:
+                    return []
+
+            # Breadth-first so shorter (closer) completions come first
+            found, queue = [], deque([node])
+            while queue and len(found) < limit:
+                current = queue.popleft()
+                for symbol in sorted(current.get(None, ())):
+                    if symbol not in found:
+                        found.append(symbol)
+                queue.extend(current[ch] for ch in sorted(ch for ch in current if ch is not None))
+            return [{'symbol': s, 'longname': self._names[s]} for s in found[:limit]]
+
+
+_query_cache = LRUCache()
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_symbol_index():
+    """Shared SymbolIndex stored next to transactions.json"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SymbolIndex()
+        return _index
+
+
+def search_symbols(query):
+    """Provider symbol search with an LRU cache of recent queries"""
+    key = query.strip().lower()
+    quotes = _query_cache.get(key)
+    cache_lookup('search', quotes is not None)
+    if quotes is None:
+        with span('fetch.search', 'network', query=key):
+            quotes = get_provider().search(query.strip())
+        _query_cache.put(key, quotes)
+        index = get_symbol_index()
+        index.add_quotes(quotes)
+        index.save()
+    return quotes
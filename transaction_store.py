@@ -0,0 +1,311 @@
+import bisect
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from paths import data_path
+
+STORE_FILE = 'transactions.sqlite'
+FIELDS = ('ticker', 'shares', 'datetime', 'price_eur')
+# PRAGMA user_version once transactions.json has been imported (or skipped)
+SCHEMA_MIGRATED = 1
+
+
+class TransactionStore:
+    """SQLite-backed transaction history indexed by ticker and by date.
+
+    Every add or delete is a single-row write inside its own SQLite
+    transaction, so a crash can never leave a half-written file behind.
+    ``transactions.json`` is kept as an import/export format: a new store
+    imports it once on first use. The migration is recorded in
+    ``PRAGMA user_version``, so deleting every transaction later does not
+    bring the old file back.
+    """
+    def __init__(self, path=None, json_path=None):
+        self.path = path or data_path(STORE_FILE)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS transactions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ticker TEXT NOT NULL,
+                shares REAL NOT NULL,
+                datetime TEXT NOT NULL,
+                price_eur REAL NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_transactions_ticker ON transactions (ticker, datetime);
+            CREATE INDEX IF NOT EXISTS idx_transactions_datetime ON transactions (datetime);
+        """)
+
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_MIGRATED:
+            if json_path and self.count() == 0 and os.path.exists(json_path):
+                try:
+                    self.import_json(json_path)
+                except (OSError, ValueError) as e:
+                    print(f"Import error: {e}")
+            with self._lock, self._conn:
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_MIGRATED}")
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+    def load(self):
+        """All transactions as dicts (with their ``id``) in insertion order"""
+        return self._select("SELECT id, ticker, shares, datetime, price_eur FROM transactions ORDER BY id")
+
+    def by_ticker(self, ticker):
+        return self._select(
+            "SELECT id, ticker, shares, datetime, price_eur FROM transactions WHERE ticker = ? ORDER BY datetime",
+            (ticker.upper(),),
+        )
+
+    def between(self, start_iso, end_iso):
+        return self._select(
+            "SELECT id, ticker, shares, datetime, price_eur FROM transactions "
+            "WHERE datetime BETWEEN ? AND ? ORDER BY datetime",
+            (start_iso, end_iso),
+        )
+
+    def add(self, transaction):
+        """Insert one transaction and return its id"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO transactions (ticker, shares, datetime, price_eur) VALUES (?, ?, ?, ?)",
+                self._values(transaction),
+            )
+            return cursor.lastrowid
+
+    def update(self, tx_id, transaction):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE transactions SET ticker = ?, shares = ?, datetime = ?, price_eur = ? WHERE id = ?",
+                (*self._values(transaction), tx_id),
+            )
+
+    def delete(self, tx_id):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM transactions WHERE id = ?", (tx_id,))
+
+    def import_json(self, path):
+        """Append every valid transaction from a transactions.json file in one
+        SQLite transaction; malformed entries are skipped. Returns the count imported"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, list):
+            raise ValueError(f"{path} does not contain a list of transactions")
+
+        rows = []
+        for index, tx in enumerate(data):
+            try:
+                values = self._values(tx)
+                _trade_time(tx)
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                print(f"Skipping transaction {index} in {path}: {e!r}")
+                continue
+            if values[0]:
+                rows.append(values)
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO transactions (ticker, shares, datetime, price_eur) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def export_json(self, path):
+        """Write all transactions in the transactions.json format, atomically"""
+        transactions = [{k: tx[k] for k in FIELDS} for tx in self.load()]
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(transactions, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return len(transactions)
+
+    def _select(self, query, params=()):
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [
+            {'id': r[0], 'ticker': r[1], 'shares': r[2], 'datetime': r[3], 'price_eur': r[4]}
+            for r in rows
+        ]
+
+    @staticmethod
+    def _values(transaction):
+        return (
+            transaction['ticker'].upper(),
+            float(transaction['shares']),
+            transaction['datetime'],
+            float(transaction.get('price_eur', 0.0)),
+        )
+
+
+def _trade_time(transaction):
+    """Transaction datetime as an aware UTC datetime; naive values are taken as UTC"""
+    dt = datetime.fromisoformat(transaction['datetime'])
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+class Holding:
+    """Position in one ticker, kept up to date one transaction at a time"""
+    def __init__(self, ticker):
+        self.ticker = ticker
+        self.shares = 0.0
+        self.cost_basis = 0.0
+        self.count = 0
+        self._trade_times = []
+
+    @property
+    def avg_price(self):
+        return self.cost_basis / self.shares if self.shares > 0 else 0.0
+
+    @property
+    def first_trade(self):
+        return self._trade_times[0] if self._trade_times else None
+
+    @property
+    def last_trade(self):
+        return self._trade_times[-1] if self._trade_times else None
+
+    def apply(self, transaction, sign=1):
+        """Add (sign=1) or take back (sign=-1) one transaction"""
+        shares = float(transaction['shares'])
+        self.shares += sign * shares
+        self.cost_basis += sign * float(transaction.get('price_eur', 0.0)) * shares
+        self.count += sign
+        trade_time = _trade_time(transaction)
+        if sign > 0:
+            bisect.insort(self._trade_times, trade_time)
+        else:
+            del self._trade_times[bisect.bisect_left(self._trade_times, trade_time)]
+        if self.count == 0:
+            # Clear rounding leftovers once the last transaction is gone
+            self.shares = self.cost_basis = 0.0
+
+
+class HoldingsIndex:
+    """Per-ticker holdings maintained incrementally as transactions come and go"""
+    def __init__(self):
+        self._holdings = {}
+
+    def __iter__(self):
+        return iter(list(self._holdings.values()))
+
+    def __len__(self):
+        return len(self._holdings)
+
+    def __contains__(self, ticker):
+        return ticker.upper() in self._holdings
+
+    def get(self, ticker):
+        return self._holdings.get(ticker.upper())
+
+    def add(self, transaction):
+        ticker = transaction['ticker'].upper()
+        holding = self._holdings.get(ticker)
+        if holding is None:
+            holding = self._holdings[ticker] = Holding(ticker)
+        holding.apply(transaction)
+        return holding
+
+    def remove(self, transaction):
+        ticker = transaction['ticker'].upper()
+        holding = self._holdings[ticker]
+        holding.apply(transaction, sign=-1)
+        if holding.count == 0:
+            del self._holdings[ticker]
+        return holding
+
+    def clear(self):
+        self._holdings.clear()
+
+
+class TransactionBook:
+    """In-memory view of the store with an id map and a per-ticker index.
+
+    Records keep the stable ``id`` assigned by the store, so lookups, edits
+    and deletes never scan the whole history. Iterating yields records in
+    insertion order. ``holdings`` follows every change, so positions are
+    never regrouped from scratch.
+    """
+    def __init__(self, store):
+        self.store = store
+        self.holdings = HoldingsIndex()
+        self._by_id = {}
+        self._by_ticker = {}
+        for transaction in store.load():
+            self._index(transaction)
+
+    def __iter__(self):
+        return iter(list(self._by_id.values()))
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def get(self, tx_id):
+        return self._by_id.get(tx_id)
+
+    def tickers(self):
+        return list(self._by_ticker)
+
+    def for_ticker(self, ticker):
+        return list(self._by_ticker.get(ticker.upper(), {}).values())
+
+    def add(self, transaction):
+        """Persist a new transaction and return the stored record"""
+        record = {k: transaction[k] for k in FIELDS}
+        record['ticker'] = record['ticker'].upper()
+        record['id'] = self.store.add(record)
+        self._index(record)
+        return record
+
+    def update(self, tx_id, changes):
+        """Persist changed fields of one transaction and return the new record"""
+        old = self._by_id[tx_id]
+        record = {**old, **{k: changes[k] for k in FIELDS if k in changes}}
+        record['ticker'] = record['ticker'].upper()
+        self.store.update(tx_id, record)
+        if record['ticker'] == old['ticker'].upper():
+            # Same ticker: replace in place to keep the ordering
+            self._by_id[tx_id] = record
+            self._by_ticker[record['ticker']][tx_id] = record
+            holding = self.holdings.get(record['ticker'])
+            holding.apply(old, sign=-1)
+            holding.apply(record)
+        else:
+            self._unindex(old)
+            self._index(record)
+        return record
+
+    def remove(self, tx_id):
+        """Delete one transaction and return the removed record"""
+        record = self._by_id[tx_id]
+        self.store.delete(tx_id)
+        self._unindex(record)
+        return record
+
+    def reload(self):
+        self._by_id.clear()
+        self._by_ticker.clear()
+        self.holdings.clear()
+        for transaction in self.store.load():
+            self._index(transaction)
+
+    def _index(self, record):
+        ticker = record['ticker'].upper()
+        self._by_id[record['id']] = record
+        self._by_ticker.setdefault(ticker, {})[record['id']] = record
+        self.holdings.add(record)
+
+    def _unindex(self, record):
+        ticker = record['ticker'].upper()
+        del self._by_id[record['id']]
+        ticker_records = self._by_ticker.get(ticker, {})
+        ticker_records.pop(record['id'], None)
+        if not ticker_records:
+            self._by_ticker.pop(ticker, None)
+        self.holdings.remove(record)
@@ -1,193 +1,203 @@
-import yfinance as yf
 import pandas as pd
-from PyQt6.QtWidgets import *
-from PyQt6.QtCore import *
+import numpy as np
 from datetime import datetime, timedelta
-from ecbdata import ecbdata
 import pytz
+import os
+import threading
+import time
+from diagnostics import cache_lookup
+from market_cache import get_market_cache
 
 ROME_TZ = pytz.timezone('Europe/Rome')
 INFLATION_RATE_ANNUAL = 0.02
+EUR_USD_TTL_SECONDS = 5 * 60
+# After a failed load the stale value is served this long before retrying
+FAILED_LOAD_RETRY_SECONDS = 60
+INFLATION_SERIES_CODE = 'ICP.M.U2.N.000000.4.ANR'
 
-def apply_stylesheet(app):
-    """Apply consistent styling across the application with larger text"""
-    app.setStyleSheet("""
-        QWidget { 
-            background-color: #FFFFFF; 
-            color: #1f2937; 
-            font-family: 'Segoe UI', Arial, sans-serif; 
-            font-size: 15px; 
-        }
-        QLineEdit, QSpinBox, QDateTimeEdit, QDoubleSpinBox {
-            background-color: #FFFFFF; 
-            border: 1px solid #E5E7EB; 
-            border-radius: 10px; 
-            padding: 10px 12px; 
-            font-size: 15px; 
-            min-height: 20px;
-        }
-        QLineEdit:focus, QSpinBox:focus, QDateTimeEdit:focus, QDoubleSpinBox:focus { 
-            border: 1px solid #3B82F6; 
-        }
-        QPushButton { 
-            background-color: #3B82F6; 
-            color: #FFFFFF; 
-            border: none; 
-            border-radius: 10px; 
-            padding: 12px 16px; 
-            font-weight: 600; 
-            font-size: 15px; 
-            min-height: 15px;
-        }
-        QPushButton:hover { background-color: #2563EB; }
-        QPushButton:pressed { background-color: #1D4ED8; }
-        QPushButton[objectName="delete_button"] {
-            background-color: #EF4444;
-            border-radius: 6px;
-            font-size: 14px;
-            min-width: 90px;
-            min-height: 35px;
-            padding: 0px 0px;
-        }
-        QPushButton[objectName="delete_button"]:hover { background-color: #DC2626; }
-        QWidget[objectName="sidebar"] { 
-            background-color: #F3F4F6; 
-            border-right: 1px solid #E5E7EB; 
-        }
-        QWidget[objectName="sidebar"] QPushButton { 
-            background: transparent; 
-            color: #111827; 
-            text-align: left; 
-            padding: 14px 16px; 
-            border-radius: 10px; 
-            font-weight: 600; 
-            font-size: 15px;
-            min-height: 25px;
-        }
-        QWidget[objectName="sidebar"] QPushButton:hover { background: #E0E7FF; }
-        QListWidget { 
-            background: #FFFFFF; 
-            border: none; 
-            padding: 8px; 
-            font-size: 15px;
-        }
-        QListWidget[objectName="transactions_list_widget"] {
-            border-radius: 12px;
-            border: 1px solid #E5E7EB;
-        }
-        QListWidget::item { 
-            outline: none; 
-            padding: 8px;
-            min-height: 30px;
-        }
-        QListWidget::item:selected { 
-            background-color: #E0E7FF; 
-            border-radius: 12px; 
-        }
-        QTableView {
-            background: #FFFFFF;
-            border: 1px solid #E5E7EB;
-            border-radius: 10px;
-            gridline-color: #E5E7EB;
-            padding: 12px; 
-            font-size: 15px;
-        }
-        QHeaderView::section {
-            background-color: #F9FAFB;
-            color: #1f2937;
-            padding: 12px;
-            border-bottom: 1px solid #E5E7EB;
-            font-size: 15px;
-            font-weight: bold;
-            min-height: 25px;
-        }
-        QLabel {
-            font-size: 15px;
-        }
-        QCheckBox {
-            font-size: 17px;
-            spacing: 8px;
-        }
-        QCheckBox::indicator {
-            width: 20px;
-            height: 20px;
-        }
-    """)
-
-class SplashScreen(QSplashScreen):
-    """Splash screen for application startup"""
-    def __init__(self, pixmap):
-        super().__init__(pixmap)
-        self.message_label = QLabel("Caricamento in corso...")
-        self.message_label.setStyleSheet(
-            "color: white; font-size: 16px; font-weight: bold; background: transparent;"
-        )
-        self.message_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        
-        layout = QVBoxLayout(self)
-        layout.addStretch()
-        layout.addWidget(self.message_label)
-        layout.addSpacing(20)
-
-    def show_message(self, message):
-        self.message_label.setText(message)
-        QCoreApplication.processEvents()
+class TTLValueCache:
+    """Process-wide cache for a single value with a time-to-live.
+
+    Concurrent callers share one in-flight load (single-flight). When a load
+    fails the last good value is served (stale-if-error) and the loader is
+    not called again for ``retry_seconds``, so an offline app does not hit
+    the network on every call. ``stats()`` reports hits, misses, shared
+    waits, stale answers and errors. A ``name`` also reports hits and misses
+    to the diagnostics tracer.
+    """
+    def __init__(self, loader, ttl_seconds, fallback=None, name=None, retry_seconds=FAILED_LOAD_RETRY_SECONDS):
+        self.loader = loader
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.retry_seconds = retry_seconds
+        self.fallback = fallback
+        self._cond = threading.Condition()
+        self._value = None
+        self._loaded_at = None
+        self._failed_at = None
+        self._loading = False
+        self._counters = {'hits': 0, 'misses': 0, 'shared': 0, 'stale': 0, 'errors': 0}
+
+    def get(self):
+        with self._cond:
+            fresh = self._is_fresh()
+            if self.name:
+                cache_lookup(self.name, fresh)
+            if fresh:
+                self._counters['hits'] += 1
+                return self._value
+            if self._loading:
+                self._counters['shared'] += 1
+                while self._loading:
+                    self._cond.wait()
+                if self._value is not None:
+                    return self._value
+            if self._backing_off():
+                self._counters['stale'] += 1
+                return self._value
+            self._loading = True
+            self._counters['misses'] += 1
+
+        value, error = None, None
+        try:
+            value = self.loader()
+        except Exception as e:
+            error = e
+
+        with self._cond:
+            self._loading = False
+            if error is None:
+                self._value, self._loaded_at, self._failed_at = value, time.monotonic(), None
+            else:
+                print(f"Cache load error: {error}")
+                self._failed_at = time.monotonic()
+                self._counters['errors'] += 1
+                if self._value is None and self.fallback is not None:
+                    self._value = self.fallback()
+                self._counters['stale'] += 1
+            self._cond.notify_all()
+            return self._value
+
+    def invalidate(self):
+        with self._cond:
+            self._loaded_at = self._failed_at = None
+
+    def stats(self):
+        with self._cond:
+            return dict(self._counters)
+
+    def _is_fresh(self):
+        return (self._loaded_at is not None
+                and time.monotonic() - self._loaded_at < self.ttl_seconds)
+
+    def _backing_off(self):
+        return (self._failed_at is not None
+                and time.monotonic() - self._failed_at < self.retry_seconds)
+
+def _load_eur_usd_rate():
+    # Raise on a failed refresh so the cache serves (and counts) the stale rate
+    rate = get_market_cache().last_quote("EURUSD=X", raise_errors=True)[0]
+    if rate is None:
+        raise LookupError("No EUR/USD quote available")
+    return rate
+
+eur_usd_cache = TTLValueCache(
+    _load_eur_usd_rate,
+    ttl_seconds=float(os.environ.get('FINANCEAPP_FX_TTL', EUR_USD_TTL_SECONDS)),
+    fallback=lambda: get_cached_eur_usd_rate(),
+    name='eur_usd',
+)
 
 def get_eur_usd_rate():
-    """Get current EUR/USD exchange rate"""
+    """Get current EUR/USD exchange rate (cached for eur_usd_cache.ttl_seconds)"""
+    return eur_usd_cache.get()
+
+def get_eur_usd_rate_on(day):
+    """EUR/USD rate for a past date (nearest session), falling back to the spot rate"""
     try:
-        data = yf.Ticker("EURUSD=X").history(period="5d")
-        return float(data.iloc[-1]['Close']) if not data.empty else 1.1
+        rate = get_market_cache().close_near("EURUSD=X", day)
+        if rate is not None:
+            return rate
     except Exception as e:
         print(f"EURUSD error: {e}")
-        return 1.1
+    return get_eur_usd_rate()
+
+def get_eur_usd_series(start_date, end_date):
+    """Daily EUR/USD rates for every calendar day between two dates.
+
+    Weekends and holidays carry the previous session's rate forward, so the
+    series can divide any daily USD series element-wise.
+    """
+    days = pd.date_range(start_date, end_date, freq='D')
+    try:
+        # Start a few days early so the first days have a rate to carry forward
+        closes = get_market_cache().history(
+            "EURUSD=X", days[0].date() - timedelta(days=7), days[-1].date()
+        )['Close'].dropna()
+    except Exception as e:
+        print(f"EURUSD history error: {e}")
+        closes = pd.Series(dtype=float)
+
+    rates = closes.reindex(closes.index.union(days)).ffill().bfill().reindex(days)
+    if rates.isna().any():
+        rates = rates.fillna(get_eur_usd_rate())
+    return rates.clip(lower=1e-9)
+
+def get_cached_eur_usd_rate():
+    """Last stored EUR/USD rate, without network access"""
+    try:
+        rate = get_market_cache().cached_close("EURUSD=X")
+    except Exception as e:
+        print(f"EURUSD cache error: {e}")
+        rate = None
+    return rate if rate is not None else 1.1
 
 def infer_price_eur_if_missing(ticker: str, when_dt_utc: datetime) -> float:
     """Infer EUR price for a stock if missing"""
     try:
         when = when_dt_utc.date()
-        hist = yf.Ticker(ticker).history(
-            start=when - timedelta(days=3), 
-            end=when + timedelta(days=4)
-        )
-        if hist.empty:
-            hist = yf.Ticker(ticker).history(period="5d")
-        
-        if not hist.empty:
-            eurusd = get_eur_usd_rate()
-            return float(hist.iloc[-1]['Close']) / max(eurusd, 1e-9)
+        close = get_market_cache().close_near(ticker, when)
+        if close is not None:
+            eurusd = get_eur_usd_rate_on(when)
+            return close / max(eurusd, 1e-9)
     except Exception as e:
         print(f"Infer price error: {e}")
     return 0.0
 
+def build_inflation_index(annual_infl, start_date, end_date, base=100.0):
+    """Build daily and monthly cumulative inflation indexes from annual rates.
+
+    Each day compounds the daily equivalent of its year's annual rate, so the
+    index is a single cumulative product. Years missing from ``annual_infl``
+    reuse the nearest known rate, or INFLATION_RATE_ANNUAL if there is none.
+    """
+    days = pd.date_range(start_date, end_date, freq='D')
+    annual = pd.Series(annual_infl, dtype=float)
+    years = pd.Index(days.year)
+    annual = annual.reindex(years.unique().union(annual.index)).ffill().bfill().fillna(INFLATION_RATE_ANNUAL)
+
+    rate_daily = (1 + annual.reindex(years).to_numpy()) ** (1 / 365) - 1
+    growth = 1 + rate_daily
+    if len(growth):
+        growth[0] = 1.0
+    infl_df_daily = pd.Series(base * np.cumprod(growth), index=days)
+    infl_df_monthly = infl_df_daily.resample('MS').first()
+    return infl_df_daily, infl_df_monthly
+
 def get_inflation_rate_annual(start_date, end_date):
-    """Get inflation data from ECB"""
-    try:
-        inflation_code = 'ICP.M.U2.N.000000.4.ANR'
-        infl_df = ecbdata.get_series(
-            inflation_code,
-            start=start_date.strftime('%Y-%m'),
-            end=end_date.strftime('%Y-%m'),
-        )
-        
+    """Get inflation data from ECB (through the on-disk inflation cache)"""
+    years = pd.RangeIndex(start_date.year, end_date.year + 1)
+    infl_df = get_market_cache().inflation(INFLATION_SERIES_CODE, start_date, end_date)
+
+    if not infl_df.empty:
         infl_df["TIME_PERIOD"] = pd.to_datetime(infl_df["TIME_PERIOD"])
         infl_df["YEAR"] = infl_df["TIME_PERIOD"].dt.year
         annual_infl = infl_df.groupby("YEAR")["OBS_VALUE"].mean() / 100.0
-        
-        infl_df_daily = pd.Series(100.0, index=pd.date_range(start_date, end_date, freq='D'))
-        inflation_rate_daily = (1 + annual_infl)**(1/365) - 1
-        
-        for i in range(1, len(infl_df_daily)):
-            rate = inflation_rate_daily[infl_df_daily.index[i].year]
-            infl_df_daily.iloc[i] = infl_df_daily.iloc[i-1] * (1 + rate)
-        
-        return infl_df_daily, annual_infl
-        
-    except Exception as e:
-        print(f"Inflation data error: {e}")
-        # Fallback with fixed inflation
-        rate_daily = (1 + INFLATION_RATE_ANNUAL)**(1/365) - 1
-        infl_df_daily = pd.Series(100.0, index=pd.date_range(start_date, end_date, freq='D'))
-        for i in range(1, len(infl_df_daily)):
-            infl_df_daily.iloc[i] = infl_df_daily.iloc[i-1] * (1 + rate_daily)
-        return infl_df_daily, pd.Series([INFLATION_RATE_ANNUAL])
+        # Years without observations yet reuse the closest known year
+        annual_infl = annual_infl.reindex(years).ffill().bfill()
+    else:
+        print("Inflation data unavailable, using fixed inflation rate")
+        annual_infl = pd.Series(INFLATION_RATE_ANNUAL, index=years)
+
+    infl_df_daily, _ = build_inflation_index(annual_infl, start_date, end_date)
+    return infl_df_daily, annual_infl
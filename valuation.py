@@ -0,0 +1,323 @@
+import numpy as np
+import pandas as pd
+
+
+SERIES_NAMES = ('invest_series', 'market_series', 'real_invest_series', 'real_market_series')
+
+
+def build_position_matrix(tx_df, date_range, weights=None):
+    """Build a (dates x tickers) matrix of cumulative share deltas.
+
+    Each transaction adds its shares (optionally multiplied by ``weights``)
+    on the day it happened; a cumulative sum down the date axis then gives
+    the position held on every day of ``date_range``.
+    """
+    tickers = sorted(tx_df['ticker'].str.upper().unique())
+    day_idx = date_range.searchsorted(tx_df['datetime'].dt.normalize().values)
+    col_idx = pd.Index(tickers).get_indexer(tx_df['ticker'].str.upper())
+    deltas = tx_df['shares'].astype(float).to_numpy()
+    if weights is not None:
+        deltas = deltas * weights
+
+    # Transactions after the last day never contribute
+    in_range = day_idx < len(date_range)
+    matrix = np.zeros((len(date_range), len(tickers)))
+    np.add.at(matrix, (day_idx[in_range], col_idx[in_range]), deltas[in_range])
+    return np.cumsum(matrix, axis=0), tickers
+
+
+def compute_daily_series(tx_df, date_range, ticker_prices, inflation_daily):
+    """Compute the nominal and real invested/market series with array operations.
+
+    Real values deflate each transaction by the inflation accrued since its
+    own date, so ``cost * I[tx] / I[day]`` is split into a cumulative sum of
+    ``cost * I[tx]`` divided day by day by ``I[day]``.
+    """
+    n_days = len(date_range)
+    tx_df = tx_df.copy()
+    tx_df['shares'] = tx_df['shares'].astype(float)
+    tx_df['price_eur'] = tx_df.get('price_eur', pd.Series(0.0, index=tx_df.index)).fillna(0.0).astype(float)
+
+    inflation = inflation_daily.reindex(date_range).ffill().bfill().to_numpy(dtype=float)
+    day_idx = date_range.searchsorted(tx_df['datetime'].dt.normalize().values)
+    in_range = day_idx < n_days
+    tx_inflation = np.ones(len(tx_df))
+    tx_inflation[in_range] = inflation[day_idx[in_range]]
+
+    # Invested capital only depends on the purchase day
+    cost = (tx_df['price_eur'] * tx_df['shares']).to_numpy()
+    cost_by_day = np.zeros(n_days)
+    real_cost_by_day = np.zeros(n_days)
+    np.add.at(cost_by_day, day_idx[in_range], cost[in_range])
+    np.add.at(real_cost_by_day, day_idx[in_range], cost[in_range] * tx_inflation[in_range])
+    invest_nom = np.cumsum(cost_by_day)
+    invest_real = np.cumsum(real_cost_by_day) / inflation
+
+    # Market value is the position matrix weighted by each ticker's price path
+    positions, tickers = build_position_matrix(tx_df, date_range)
+    real_positions, _ = build_position_matrix(tx_df, date_range, weights=tx_inflation)
+    prices = np.zeros((n_days, len(tickers)))
+    for col, ticker in enumerate(tickers):
+        if ticker in ticker_prices:
+            prices[:, col] = ticker_prices[ticker].reindex(date_range).fillna(0.0).to_numpy()
+    market_nom = (positions * prices).sum(axis=1)
+    market_real = (real_positions * prices).sum(axis=1) / inflation
+
+    return {
+        'invest_series': pd.Series(invest_nom, index=date_range),
+        'market_series': pd.Series(market_nom, index=date_range),
+        'real_invest_series': pd.Series(invest_real, index=date_range),
+        'real_market_series': pd.Series(market_real, index=date_range),
+    }
+
+
+def compute_yearly_dividends(tx_df, dividends_by_ticker, years):
+    """Dividends received per year and ticker, as a (years x tickers) DataFrame.
+
+    Shares held at each ex-date come from a binary search into the ticker's
+    sorted cumulative position, then all payments are summed per year and
+    ticker in one groupby.
+    """
+    tickers = sorted(tx_df['ticker'].unique())
+    payments = []
+    for ticker in tickers:
+        dividends = dividends_by_ticker.get(ticker)
+        if dividends is None or dividends.empty:
+            continue
+
+        ticker_tx = tx_df[tx_df['ticker'] == ticker].sort_values('datetime')
+        held = np.concatenate([[0.0], np.cumsum(ticker_tx['shares'].astype(float).to_numpy())])
+        positions = np.searchsorted(ticker_tx['datetime'].to_numpy(), dividends.index.to_numpy(), side='right')
+        payments.append(pd.DataFrame({
+            'year': dividends.index.year,
+            'ticker': ticker,
+            'amount': dividends.to_numpy(dtype=float) * held[positions],
+        }))
+
+    matrix = pd.DataFrame(0.0, index=pd.Index(years), columns=tickers)
+    if payments:
+        per_year = pd.concat(payments).groupby(['year', 'ticker'])['amount'].sum().unstack(fill_value=0.0)
+        matrix = matrix.add(per_year.reindex(index=matrix.index, columns=tickers), fill_value=0.0).fillna(0.0)
+    return matrix
+
+
+def transactions_frame(transactions):
+    """DataFrame of transaction records with tz-naive UTC datetimes"""
+    tx_df = pd.DataFrame(list(transactions))
+    tx_df['datetime'] = pd.to_datetime(tx_df['datetime'], utc=True, format='ISO8601').dt.tz_localize(None)
+    return tx_df
+
+
+class PortfolioValuation:
+    """Daily series that are patched one transaction at a time.
+
+    Built once with compute_daily_series, then ``sync`` diffs a new list of
+    transactions (by ``id``) against the ones already counted and adds or
+    subtracts only their contributions from the affected date suffix. The
+    last day's prices follow the live quotes, so a change there is patched
+    into the last row; if earlier prices or the inflation index differ from
+    the ones the series were built with, ``sync`` refuses and the caller
+    rebuilds from scratch.
+    """
+    MAX_PATCHES = 500
+
+    def __init__(self, transactions, date_range, ticker_prices, inflation_daily):
+        self.date_range = date_range
+        self.inflation = inflation_daily.reindex(date_range).ffill().bfill().to_numpy(dtype=float)
+        self.prices = {
+            ticker: prices.reindex(date_range).fillna(0.0).to_numpy(dtype=float)
+            for ticker, prices in ticker_prices.items()
+        }
+        self.transactions = {tx['id']: dict(tx) for tx in transactions}
+        self.tickers = {tx['ticker'].upper() for tx in self.transactions.values()}
+
+        series = compute_daily_series(
+            transactions_frame(self.transactions.values()), date_range, ticker_prices, inflation_daily
+        )
+        self.values = {name: series[name].to_numpy(dtype=float).copy() for name in SERIES_NAMES}
+
+    def series(self, date_range):
+        """The four series over ``date_range``, which must end where this valuation ends"""
+        offset = self.date_range.get_loc(date_range[0])
+        return {name: pd.Series(values[offset:], index=date_range) for name, values in self.values.items()}
+
+    def sync(self, transactions, date_range, ticker_prices, inflation_daily):
+        """Patch the series to match ``transactions``; False if a full rebuild is needed"""
+        if date_range[-1] != self.date_range[-1] or date_range[0] < self.date_range[0]:
+            return False
+
+        current = {}
+        for tx in transactions:
+            if 'id' not in tx:
+                return False
+            current[tx['id']] = tx
+        removed = [tx for tx_id, tx in self.transactions.items() if current.get(tx_id) != tx]
+        added = [tx for tx_id, tx in current.items() if self.transactions.get(tx_id) != tx]
+        if len(removed) + len(added) > self.MAX_PATCHES:
+            return False
+
+        kept_tickers = self.tickers & {tx['ticker'].upper() for tx in current.values()}
+        last_prices = self._moved_last_prices(date_range, kept_tickers, ticker_prices, inflation_daily)
+        if last_prices is None:
+            return False
+        self._patch_last_prices(last_prices)
+
+        # Tickers that were not held yet bring their own price path
+        for ticker in {tx['ticker'].upper() for tx in added} - self.tickers:
+            self.prices.pop(ticker, None)
+            if ticker in ticker_prices:
+                self.prices[ticker] = ticker_prices[ticker].reindex(self.date_range).fillna(0.0).to_numpy(dtype=float)
+
+        for tx in removed:
+            self._apply(tx, -1.0)
+            del self.transactions[tx['id']]
+        for tx in added:
+            self._apply(tx, 1.0)
+            self.transactions[tx['id']] = dict(tx)
+        self.tickers = {tx['ticker'].upper() for tx in self.transactions.values()}
+        return True
+
+    def _moved_last_prices(self, date_range, tickers, ticker_prices, inflation_daily):
+        """Last-day prices of ``tickers`` that moved, {ticker: price}; None if
+        inflation or any earlier price differs from the ones already used"""
+        offset = self.date_range.get_loc(date_range[0])
+        # Only ratios of the index matter, so compare it up to its base
+        inflation = inflation_daily.reindex(date_range).ffill().bfill().to_numpy(dtype=float)
+        if not np.allclose(inflation / inflation[0], self.inflation[offset:] / self.inflation[offset], rtol=1e-12, atol=0):
+            return None
+        moved = {}
+        for ticker in tickers:
+            if (ticker in ticker_prices) != (ticker in self.prices):
+                return None
+            if ticker not in self.prices:
+                continue
+            prices = ticker_prices[ticker].reindex(date_range).fillna(0.0).to_numpy(dtype=float)
+            if not np.array_equal(prices[:-1], self.prices[ticker][offset:-1]):
+                return None
+            if prices[-1] != self.prices[ticker][-1]:
+                moved[ticker] = prices[-1]
+        return moved
+
+    def _patch_last_prices(self, last_prices):
+        """Revalue the last day with the new latest price of some tickers"""
+        if not last_prices:
+            return
+        deltas = {}
+        for ticker, price in last_prices.items():
+            deltas[ticker] = price - self.prices[ticker][-1]
+            self.prices[ticker][-1] = price
+
+        for tx in self.transactions.values():
+            delta = deltas.get(tx['ticker'].upper())
+            day = self._day(tx) if delta is not None else len(self.date_range)
+            if day < len(self.date_range):
+                market = float(tx['shares']) * delta
+                self.values['market_series'][-1] += market
+                self.values['real_market_series'][-1] += market * self.inflation[day] / self.inflation[-1]
+
+    def _day(self, tx):
+        """Index in ``date_range`` of the day a transaction happened"""
+        tx_day = pd.Timestamp(tx['datetime'])
+        tx_day = (tx_day.tz_convert(None) if tx_day.tzinfo is not None else tx_day).normalize()
+        return self.date_range.searchsorted(tx_day)
+
+    def _apply(self, tx, sign):
+        """Add (sign=1) or subtract (sign=-1) one transaction from day of trade onwards"""
+        day = self._day(tx)
+        if day >= len(self.date_range):
+            return
+
+        shares = float(tx['shares'])
+        cost = sign * float(tx.get('price_eur') or 0.0) * shares
+        deflator = self.inflation[day] / self.inflation[day:]
+        self.values['invest_series'][day:] += cost
+        self.values['real_invest_series'][day:] += cost * deflator
+
+        prices = self.prices.get(tx['ticker'].upper())
+        if prices is not None:
+            market = sign * shares * prices[day:]
+            self.values['market_series'][day:] += market
+            self.values['real_market_series'][day:] += market * deflator
+
+
+def compute_daily_series_loop(tx_df, date_range, ticker_prices, inflation_daily):
+    """Reference day-by-day implementation, kept to validate compute_daily_series"""
+    series = {name: pd.Series(0.0, index=date_range) for name in SERIES_NAMES}
+
+    for day_idx, day_ts in enumerate(date_range):
+        totals = {'invest_nom': 0.0, 'market_nom': 0.0, 'invest_real': 0.0, 'market_real': 0.0}
+        current_inflation = inflation_daily.loc[day_ts]
+
+        for _, transaction in tx_df.iterrows():
+            tx_date = pd.to_datetime(transaction['datetime']).normalize()
+            if tx_date > day_ts:
+                continue
+
+            cost_nominal = float(transaction.get('price_eur', 0.0)) * float(transaction.get('shares', 0.0))
+            totals['invest_nom'] += cost_nominal
+            try:
+                tx_inflation = inflation_daily.loc[tx_date]
+                totals['invest_real'] += cost_nominal / (current_inflation / tx_inflation)
+            except KeyError:
+                totals['invest_real'] += cost_nominal
+
+            ticker = transaction['ticker'].upper()
+            if ticker in ticker_prices:
+                try:
+                    market_value_nominal = float(transaction['shares']) * ticker_prices[ticker].loc[day_ts]
+                    totals['market_nom'] += market_value_nominal
+                    tx_inflation = inflation_daily.loc[tx_date]
+                    totals['market_real'] += market_value_nominal / (current_inflation / tx_inflation)
+                except KeyError:
+                    pass
+
+        series['invest_series'].iloc[day_idx] = totals['invest_nom']
+        series['market_series'].iloc[day_idx] = totals['market_nom']
+        series['real_invest_series'].iloc[day_idx] = totals['invest_real']
+        series['real_market_series'].iloc[day_idx] = totals['market_real']
+
+    return series
+
+
+def check_equivalence(tx_df, date_range, ticker_prices, inflation_daily, rtol=1e-9, atol=1e-6):
+    """Compare the vectorized engine with the reference loop.
+
+    Returns a dict with the maximum absolute difference per series and
+    raises AssertionError if any series differs beyond the tolerances.
+    """
+    fast = compute_daily_series(tx_df, date_range, ticker_prices, inflation_daily)
+    slow = compute_daily_series_loop(tx_df, date_range, ticker_prices, inflation_daily)
+
+    diffs = {}
+    for name in SERIES_NAMES:
+        diffs[name] = float(np.max(np.abs(fast[name].values - slow[name].values), initial=0.0))
+        if not np.allclose(fast[name].values, slow[name].values, rtol=rtol, atol=atol):
+            raise AssertionError(f"{name} differs from reference loop (max abs diff {diffs[name]:.6g})")
+    return diffs
+
+
+def _synthetic_inputs(n_tickers=5, n_transactions=60, n_days=900, seed=0):
+    rng = np.random.default_rng(seed)
+    date_range = pd.date_range('2020-01-01', periods=n_days, freq='D')
+    tickers = [f"T{i}" for i in range(n_tickers)]
+
+    offsets = rng.integers(0, n_days, n_transactions)
+    tx_df = pd.DataFrame({
+        'ticker': rng.choice(tickers, n_transactions),
+        'shares': rng.integers(1, 50, n_transactions).astype(float),
+        'datetime': date_range[offsets] + pd.to_timedelta(rng.integers(0, 86400, n_transactions), unit='s'),
+        'price_eur': rng.uniform(5, 500, n_transactions).round(2),
+    })
+
+    # Leave the last ticker without prices, like a delisted symbol
+    ticker_prices = {
+        t: pd.Series(np.abs(100 + rng.normal(0, 1, n_days).cumsum()), index=date_range)
+        for t in tickers[:-1]
+    }
+    inflation_daily = pd.Series(100.0 * np.cumprod(np.full(n_days, 1.0001)), index=date_range)
+    return tx_df, date_range, ticker_prices, inflation_daily
+
+
+if __name__ == '__main__':
+    for name, diff in check_equivalence(*_synthetic_inputs()).items():
+        print(f"{name}: max abs diff {diff:.3g}")
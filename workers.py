@@ -0,0 +1,98 @@
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+QUOTE_BATCH_SIZE = 25
+
+
+class WorkerSignals(QObject):
+    """Signals emitted by background workers, delivered on the GUI thread"""
+    result = pyqtSignal(object)
+    error = pyqtSignal(object)
+    finished = pyqtSignal()
+
+
+class FunctionWorker(QRunnable):
+    """Run a callable on the shared thread pool and emit its result"""
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.error.emit(e)
+        else:
+            self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()
+
+
+class QuoteSignals(QObject):
+    quote_ready = pyqtSignal(int, str, object, object)
+    finished = pyqtSignal(int)
+
+
+class QuoteRefreshWorker(QRunnable):
+    """Fetch the latest EUR price for a batch of tickers.
+
+    Emits ``quote_ready(generation, ticker, price_eur, close_date)`` for
+    every ticker, with None when no price could be found. ``close_date`` is
+    the trading day of the close, so callers can tell a stored old close
+    from a fresh one.
+    """
+    def __init__(self, generation, tickers, signals):
+        super().__init__()
+        self.generation = generation
+        self.tickers = tickers
+        self.signals = signals
+
+    def run(self):
+        from market_cache import get_market_cache
+        from utils import get_eur_usd_rate
+
+        try:
+            eurusd = get_eur_usd_rate()
+            try:
+                quotes = get_market_cache().last_quotes(self.tickers)
+            except Exception as e:
+                print(f"Quote batch error: {e}")
+                quotes = {ticker.upper(): self._single_quote(ticker) for ticker in self.tickers}
+
+            for ticker in self.tickers:
+                close, close_date = quotes.get(ticker.upper(), (None, None))
+                price_eur = close / max(eurusd, 1e-9) if close is not None else None
+                self.signals.quote_ready.emit(self.generation, ticker, price_eur, close_date)
+        finally:
+            self.signals.finished.emit(self.generation)
+
+    @staticmethod
+    def _single_quote(ticker):
+        from market_cache import get_market_cache
+
+        try:
+            return get_market_cache().last_quote(ticker)
+        except Exception as e:
+            print(f"Price error for {ticker}: {e}")
+            return None, None
+
+
+def start_quote_refresh(generation, tickers, on_quote, batch_size=QUOTE_BATCH_SIZE, on_finished=None):
+    """Split ``tickers`` into batches and refresh them on the shared thread pool.
+
+    Each batch owns its signals object, so a receiver destroyed mid-refresh
+    simply stops getting results. ``on_finished(generation)`` is called once
+    per batch; the number of batches is returned.
+    """
+    pool = QThreadPool.globalInstance()
+    batches = 0
+    for i in range(0, len(tickers), batch_size):
+        signals = QuoteSignals()
+        signals.quote_ready.connect(on_quote)
+        if on_finished is not None:
+            signals.finished.connect(on_finished)
+        pool.start(QuoteRefreshWorker(generation, tickers[i:i + batch_size], signals))
+        batches += 1
+    return batches